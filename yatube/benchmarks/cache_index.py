@@ -0,0 +1,128 @@
+"""
+Benchmark of index page cache with several worker processes.
+
+Runs N processes, each requesting random index pages through the WSGI
+app with a small share of new posts, and reports cache hit rate and
+latency percentiles. Compare per-process and shared caches:
+
+    python -m benchmarks.cache_index --workers 4 --cache locmem
+    python -m benchmarks.cache_index --workers 4 --cache file
+    python -m benchmarks.cache_index --workers 4 --cache file --local-tier
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from .utils import (latency_summary, save_results, setup_django,
+                    temporary_database)
+
+
+def seed(posts):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from posts.models import Group, Post
+
+    call_command('migrate', verbosity=0)
+    if os.environ.get('YATUBE_CACHE') == 'db':
+        call_command('createcachetable', verbosity=0)
+    user = get_user_model().objects.create_user(username='bench')
+    group = Group.objects.create(
+        title='Бенчмарк', slug='bench', description='Бенчмарк'
+    )
+    for i in range(posts):
+        Post.objects.create(text=f'Пост {i}', author=user, group=group)
+
+
+def worker(env, requests, pages, write_ratio, seed_value):
+    setup_django(env)
+    from django.db import OperationalError, connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from posts.models import Post
+
+    client = Client()
+    rand = random.Random(seed_value)
+    author_id = Post.objects.values_list('author_id', flat=True).first()
+    latencies, hits, writes, lock_errors = [], 0, 0, 0
+    for _ in range(requests):
+        if rand.random() < write_ratio:
+            try:
+                Post.objects.create(text='Новый пост', author_id=author_id)
+                writes += 1
+            except OperationalError:
+                lock_errors += 1
+        url = f'/?page={rand.randint(1, pages)}'
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - started)
+        if not any(
+            'posts_post' in query['sql']
+            for query in context.captured_queries
+        ):
+            hits += 1
+    return latencies, hits, writes, lock_errors
+
+
+def run(workers, requests, pages, write_ratio, env):
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        results = pool.starmap(worker, [
+            (env, requests, pages, write_ratio, number)
+            for number in range(workers)
+        ])
+    latencies = [value for result in results for value in result[0]]
+    hits = sum(result[1] for result in results)
+    return {
+        'workers': workers,
+        'requests': len(latencies),
+        'hit_rate': round(hits / len(latencies), 4),
+        'writes': sum(result[2] for result in results),
+        'lock_errors': sum(result[3] for result in results),
+        'latency': latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests per worker')
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--write-ratio', type=float, default=0.01)
+    parser.add_argument('--cache', default='locmem',
+                        choices=['locmem', 'file', 'db', 'redis', 'memcached'])
+    parser.add_argument('--local-tier', action='store_true')
+    parser.add_argument('--json', help='path to save results')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    env = temporary_database(directory)
+    env['YATUBE_CACHE'] = args.cache
+    env['YATUBE_CACHE_LOCAL_TIER'] = '1' if args.local_tier else '0'
+    if args.cache == 'file':
+        env['YATUBE_CACHE_LOCATION'] = os.path.join(directory, 'cache')
+    try:
+        setup_django(env)
+        seed(args.posts)
+        from django.db import connections
+        connections.close_all()
+        results = run(
+            args.workers, args.requests, args.pages, args.write_ratio, env
+        )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    results.update(cache=args.cache, local_tier=args.local_tier)
+    print(results)
+    save_results(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Concurrency benchmark of the add_comment write path.
+
+N worker processes post comments to a few hot posts through the WSGI
+app as different users, first with comments saved in their requests,
+then with the in-process buffer flushed every --interval milliseconds.
+The rate limit is off. Reports comments saved per second, lock errors
+and latency percentiles of the requests:
+
+    python -m benchmarks.comments --workers 8 --requests 200
+    python -m benchmarks.comments --modes buffered --interval 5
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+
+from .load import get_commit
+from .sqlite_writers import seed
+from .utils import (latency_summary, save_results, setup_django,
+                    temporary_database)
+
+DIRECT = 'direct'
+BUFFERED = 'buffered'
+MODES = (DIRECT, BUFFERED)
+HOT_POSTS = 5
+
+
+def worker(env, number, session, post_ids, requests, interval):
+    setup_django(env)
+    import logging
+
+    from django.conf import settings
+    from django.db import OperationalError
+    from django.test import Client
+    from django.urls import reverse
+
+    from posts import ingest
+
+    settings.COMMENT_RATE_LIMIT = None
+    settings.COMMENT_BUFFER_INTERVAL = interval
+    logging.getLogger('django.request').disabled = True
+    rand = random.Random(number)
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session
+    latencies, errors = [], 0
+    for request in range(requests):
+        url = reverse('posts:add_comment', args=(rand.choice(post_ids),))
+        started = time.perf_counter()
+        try:
+            failed = client.post(
+                url, {'text': f'Комментарий {number}.{request}'}
+            ).status_code >= 500
+        except OperationalError:
+            failed = True
+        latencies.append(time.perf_counter() - started)
+        errors += failed
+    ingest.buffer.flush()
+    return latencies, errors
+
+
+def count_comments(env):
+    setup_django(env)
+    from posts.models import Comment
+
+    return Comment.objects.count()
+
+
+def run_mode(mode, workers, requests, interval):
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    env = temporary_database(directory)
+    context = multiprocessing.get_context('spawn')
+    try:
+        with context.Pool(1) as pool:
+            sessions, post_ids = pool.apply(seed, (env, workers))
+        with context.Pool(workers) as pool:
+            started = time.perf_counter()
+            results = pool.starmap(worker, [
+                (
+                    env, number, session, post_ids[:HOT_POSTS], requests,
+                    interval / 1000 if mode == BUFFERED else None
+                )
+                for number, session in enumerate(sessions)
+            ])
+            duration = time.perf_counter() - started
+        with context.Pool(1) as pool:
+            saved = pool.apply(count_comments, (env,))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    latencies = [value for result in results for value in result[0]]
+    return {
+        'mode': mode,
+        'comments': saved,
+        'duration_s': round(duration, 3),
+        'comments_per_s': round(saved / duration, 1),
+        'lock_errors': sum(result[1] for result in results),
+        'requests': latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='comments per worker')
+    parser.add_argument('--interval', type=float, default=5,
+                        help='buffer flush interval, milliseconds')
+    parser.add_argument('--modes', nargs='+', choices=MODES,
+                        default=list(MODES))
+    parser.add_argument('--json', help='path to save results')
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        result = run_mode(mode, args.workers, args.requests, args.interval)
+        print(result)
+        results.append(result)
+    save_results({
+        'commit': get_commit(),
+        'workers': args.workers,
+        'results': results,
+    }, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark of views running independent queries in a thread pool.
+
+A fresh database is seeded, then for every --query-workers value one
+process serves --threads request threads, like a threaded WSGI server,
+with the cache off. Every thread opens profile, post and follow pages
+as its own user. Reports requests per second, failed requests and
+latency percentiles:
+
+    python -m benchmarks.concurrency --threads 8 --requests 100
+    python -m benchmarks.concurrency --query-workers 0 2 4
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from .load import get_commit
+from .sqlite_writers import seed
+from .utils import (latency_summary, save_results, setup_django,
+                    temporary_database)
+
+
+def serve(env, query_workers, sessions, post_ids, requests):
+    env = {**env, 'YATUBE_QUERY_WORKERS': str(query_workers)}
+    setup_django(env)
+    from django.conf import settings
+    from django.db import connections
+    from django.test import Client
+    from django.urls import reverse
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }}
+    urls = [reverse('posts:profile', args=('writer0',)),
+            reverse('posts:follow_index')]
+    urls.extend(
+        reverse('posts:post_detail', args=(post_id,)) for post_id in post_ids
+    )
+    latencies, errors = [], []
+
+    def thread(number, session):
+        rand = random.Random(number)
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session
+        for _ in range(requests):
+            url = rand.choice(urls)
+            started = time.perf_counter()
+            failed = client.get(url).status_code != 200
+            latencies.append(time.perf_counter() - started)
+            errors.append(failed)
+        connections.close_all()
+
+    threads = [
+        threading.Thread(target=thread, args=(number, session))
+        for number, session in enumerate(sessions)
+    ]
+    started = time.perf_counter()
+    for request_thread in threads:
+        request_thread.start()
+    for request_thread in threads:
+        request_thread.join()
+    duration = time.perf_counter() - started
+    return {
+        'query_workers': query_workers,
+        'requests': len(latencies),
+        'duration_s': round(duration, 3),
+        'requests_per_s': round(len(latencies) / duration, 1),
+        'errors': sum(errors),
+        'latency': latency_summary(latencies),
+    }
+
+
+def follow_all(env):
+    """Makes every writer follow the author of the seeded posts."""
+    setup_django(env)
+    from posts.models import Follow, User
+
+    author = User.objects.get(username='writer0')
+    for user in User.objects.exclude(pk=author.pk):
+        Follow.objects.create(user=user, author=author)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100,
+                        help='requests per thread')
+    parser.add_argument('--query-workers', type=int, nargs='+',
+                        default=[0, 4])
+    parser.add_argument('--json', help='path to save results')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    env = temporary_database(directory)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    try:
+        with context.Pool(1) as pool:
+            sessions, post_ids = pool.apply(seed, (env, args.threads))
+        with context.Pool(1) as pool:
+            pool.apply(follow_all, (env,))
+        for query_workers in args.query_workers:
+            with context.Pool(1) as pool:
+                result = pool.apply(serve, (
+                    env, query_workers, sessions, post_ids, args.requests
+                ))
+            print(result)
+            results.append(result)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    save_results({
+        'commit': get_commit(),
+        'threads': args.threads,
+        'results': results,
+    }, args.json)
+
+
+if __name__ == '__main__':
+    main()
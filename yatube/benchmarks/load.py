@@ -0,0 +1,225 @@
+"""
+Load benchmark of the main pages on a synthetic dataset.
+
+Generates the dataset with `generate_dataset` in a temporary database
+(or uses an existing one), then N worker processes replay a weighted
+mix of index, group_posts, profile, post_detail, follow_index and
+post_create requests through the WSGI app as logged in users. Reports
+throughput and latency percentiles of every view; save results of two
+commits with --json to compare them:
+
+    python -m benchmarks.load --workers 4 --requests 500 --json before.json
+    python -m benchmarks.load --database /tmp/yatube.sqlite3 --no-seed
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from .utils import (latency_summary, save_results, setup_django,
+                    temporary_database)
+
+DEFAULT_MIX = {
+    'index': 30,
+    'group_posts': 15,
+    'profile': 15,
+    'post_detail': 25,
+    'follow_index': 12,
+    'post_create': 3,
+}
+PAGES = 10
+
+
+def parse_mix(value):
+    """Parses 'index=30,profile=10' into weights of the views."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'unknown view {name}')
+        mix[name] = float(weight)
+    return mix
+
+
+def get_commit():
+    """Returns current git commit of the tree or None."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(options):
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_dataset', verbosity=0, **options)
+
+
+def get_targets():
+    """Returns ids and names the requests are made to."""
+    from posts.models import Group, Post, User
+
+    return {
+        # Users are ordered by popularity rank of the dataset
+        'users': list(User.objects.order_by('pk').values_list(
+            'username', flat=True
+        )),
+        'groups': list(Group.objects.values_list('slug', flat=True)),
+        'posts': list(Post.objects.values_list('pk', flat=True)[:1000]),
+    }
+
+
+def pick_page(rand):
+    return 1 if rand.random() < 0.7 else rand.randint(2, PAGES)
+
+
+def make_request(name, rand, targets, weights):
+    """Returns method, URL and data of the request to the view."""
+    from django.urls import reverse
+
+    if name == 'index':
+        return 'get', reverse('posts:index'), {'page': pick_page(rand)}
+    if name == 'group_posts':
+        slug = rand.choice(targets['groups'])
+        return 'get', reverse('posts:group_list', args=(slug,)), {
+            'page': pick_page(rand)
+        }
+    if name == 'profile':
+        username = rand.choices(targets['users'], cum_weights=weights)[0]
+        return 'get', reverse('posts:profile', args=(username,)), {
+            'page': pick_page(rand)
+        }
+    if name == 'post_detail':
+        post_id = rand.choice(targets['posts'])
+        return 'get', reverse('posts:post_detail', args=(post_id,)), None
+    if name == 'follow_index':
+        return 'get', reverse('posts:follow_index'), {
+            'page': pick_page(rand)
+        }
+    return 'post', reverse('posts:post_create'), {
+        'text': f'Пост нагрузочного теста {rand.random()}'
+    }
+
+
+def worker(env, requests, mix, seed_value, targets):
+    setup_django(env)
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from posts.dataset import zipf_weights
+
+    rand = random.Random(seed_value)
+    weights = zipf_weights(len(targets['users']), 1.1)
+    client = Client()
+    client.force_login(get_user_model().objects.get(
+        username=rand.choice(targets['users'])
+    ))
+    names, name_weights = zip(*mix.items())
+    latencies, errors = defaultdict(list), Counter()
+    for _ in range(requests):
+        name = rand.choices(names, name_weights)[0]
+        method, url, data = make_request(name, rand, targets, weights)
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors[name] += 1
+    return dict(latencies), dict(errors)
+
+
+def run(workers, requests, mix, env, targets):
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        started = time.perf_counter()
+        results = pool.starmap(worker, [
+            (env, requests, mix, number, targets)
+            for number in range(workers)
+        ])
+        duration = time.perf_counter() - started
+    latencies, errors = defaultdict(list), Counter()
+    for worker_latencies, worker_errors in results:
+        for name, values in worker_latencies.items():
+            latencies[name].extend(values)
+        errors.update(worker_errors)
+    total = list(itertools.chain.from_iterable(latencies.values()))
+    return {
+        'workers': workers,
+        'requests': len(total),
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(total) / duration, 1),
+        'errors': sum(errors.values()),
+        'latency': latency_summary(total),
+        'views': {
+            name: dict(latency_summary(values), errors=errors[name])
+            for name, values in sorted(latencies.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests per worker')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='weights of views, e.g. index=30,profile=10')
+    parser.add_argument('--database',
+                        help='existing sqlite database instead of a new one')
+    parser.add_argument('--no-seed', action='store_true',
+                        help='do not generate the dataset')
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--follows', type=int, default=10)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--image-share', type=float, default=0.1)
+    parser.add_argument('--json', help='path to save results')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    env = temporary_database(directory)
+    if args.database:
+        env['YATUBE_DB_NAME'] = os.path.abspath(args.database)
+    env['YATUBE_MEDIA_ROOT'] = os.path.join(directory, 'media')
+    dataset = {
+        'users': args.users,
+        'groups': args.groups,
+        'posts': args.posts,
+        'follows': args.follows,
+        'comments': args.comments,
+        'image_share': args.image_share,
+    }
+    try:
+        setup_django(env)
+        if not args.no_seed:
+            seed(dataset)
+        targets = get_targets()
+        from django.db import connections
+        connections.close_all()
+        results = run(args.workers, args.requests, args.mix, env, targets)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    results.update(
+        commit=get_commit(),
+        mix=args.mix,
+        dataset=None if args.no_seed else dataset,
+    )
+    print(results)
+    save_results(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark of concurrent writers on SQLite with both database profiles.
+
+For every profile a fresh database is seeded, then N processes send
+post_create and add_comment requests through the WSGI app as different
+users, with a share of page reads. Reports "database is locked" errors
+and latency percentiles of writes and reads:
+
+    python -m benchmarks.sqlite_writers --workers 8 --requests 200
+    python -m benchmarks.sqlite_writers --profiles production
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+
+from .utils import (latency_summary, save_results, setup_django,
+                    temporary_database)
+
+PROFILES = ('default', 'production')
+
+
+def seed(env, workers):
+    """
+    Creates writers with their sessions and posts to comment.
+    Returns session keys and post ids, so workers start without writes.
+    """
+    setup_django(env)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+
+    from posts.models import Post
+
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    sessions = []
+    for number in range(workers):
+        client = Client()
+        client.force_login(User.objects.create_user(f'writer{number}'))
+        sessions.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+    author = User.objects.get(username='writer0')
+    post_ids = [
+        Post.objects.create(text=f'Пост {number}', author=author).pk
+        for number in range(50)
+    ]
+    return sessions, post_ids
+
+
+def worker(env, number, session, post_ids, requests, read_ratio):
+    setup_django(env)
+    import logging
+
+    from django.conf import settings
+    from django.db import OperationalError
+    from django.test import Client
+    from django.urls import reverse
+
+    # Writers measure lock contention, not fast 429 answers
+    settings.COMMENT_RATE_LIMIT = None
+    # Failed requests are counted, not logged with tracebacks
+    logging.getLogger('django.request').disabled = True
+    rand = random.Random(number)
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session
+    writes, reads, errors = [], [], 0
+    for request in range(requests):
+        post_id = rand.choice(post_ids)
+        if rand.random() < read_ratio:
+            method, url, data, latencies = (
+                client.get, reverse('posts:post_detail', args=(post_id,)),
+                None, reads
+            )
+        elif request % 2:
+            method, url, data, latencies = (
+                client.post, reverse('posts:post_create'),
+                {'text': f'Пост писателя {number}'}, writes
+            )
+        else:
+            method, url, data, latencies = (
+                client.post, reverse('posts:add_comment', args=(post_id,)),
+                {'text': f'Комментарий писателя {number}'}, writes
+            )
+        started = time.perf_counter()
+        try:
+            response = method(url, data)
+            failed = response.status_code >= 500
+        except OperationalError:
+            failed = True
+        latencies.append(time.perf_counter() - started)
+        errors += failed
+    return writes, reads, errors
+
+
+def run_profile(profile, workers, requests, read_ratio):
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    env = temporary_database(directory)
+    env['YATUBE_DB_PROFILE'] = profile
+    context = multiprocessing.get_context('spawn')
+    try:
+        with context.Pool(1) as pool:
+            sessions, post_ids = pool.apply(seed, (env, workers))
+        with context.Pool(workers) as pool:
+            started = time.perf_counter()
+            results = pool.starmap(worker, [
+                (env, number, session, post_ids, requests, read_ratio)
+                for number, session in enumerate(sessions)
+            ])
+            duration = time.perf_counter() - started
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    writes = [value for result in results for value in result[0]]
+    reads = [value for result in results for value in result[1]]
+    errors = sum(result[2] for result in results)
+    return {
+        'profile': profile,
+        'requests': len(writes) + len(reads),
+        'duration_s': round(duration, 3),
+        'lock_errors': errors,
+        'error_rate': round(errors / (len(writes) + len(reads)), 4),
+        'writes': latency_summary(writes),
+        'reads': latency_summary(reads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per worker')
+    parser.add_argument('--read-ratio', type=float, default=0.3)
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES,
+                        default=list(PROFILES))
+    parser.add_argument('--json', help='path to save results')
+    args = parser.parse_args()
+
+    results = []
+    for profile in args.profiles:
+        result = run_profile(
+            profile, args.workers, args.requests, args.read_ratio
+        )
+        print(result)
+        results.append(result)
+    save_results({'workers': args.workers, 'results': results}, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark of "who to follow" suggestions on a synthetic follow graph.
+
+Generates a graph of --users users and about --edges follows, with
+followed authors chosen by Zipf popularity, builds the CSR adjacency
+and its transpose and scores suggestions of --sample users. Reports
+build time, memory of the arrays against sets of Python ints, and
+latency percentiles of one user's suggestions:
+
+    python -m benchmarks.suggestions --users 50000 --edges 1000000
+"""
+import argparse
+import random
+import sys
+import time
+from itertools import accumulate
+
+from .load import get_commit
+from .utils import latency_summary, save_results, setup_django
+
+
+def generate_edges(users, edges, seed):
+    """Yields follows sorted by follower, authors are chosen by Zipf."""
+    rand = random.Random(seed)
+    weights = list(accumulate(1 / rank for rank in range(1, users + 1)))
+    authors = list(range(users))
+    rand.shuffle(authors)
+    average = edges / users
+    for user in range(users):
+        degree = min(users - 1, round(rand.expovariate(1 / average)))
+        followed = set()
+        while len(followed) < degree:
+            followed.update(
+                authors[index] for index in rand.choices(
+                    range(users), cum_weights=weights,
+                    k=degree - len(followed)
+                )
+            )
+            followed.discard(user)
+        for author in sorted(followed):
+            yield user, author
+
+
+def sets_size(graph):
+    """Returns bytes of the same graph kept as dict of sets of ints."""
+    total = sys.getsizeof({})
+    for node in range(graph.size):
+        neighbours = set(graph.neighbours(node))
+        total += sys.getsizeof(neighbours) + sum(
+            sys.getsizeof(target) for target in neighbours
+        )
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--edges', type=int, default=1000000)
+    parser.add_argument('--sample', type=int, default=1000,
+                        help='users whose suggestions are scored')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='path to save results')
+    args = parser.parse_args()
+
+    setup_django()
+    from posts.suggestions import (FollowGraph, score_candidates,
+                                   top_candidates)
+
+    edges = list(generate_edges(args.users, args.edges, args.seed))
+    started = time.perf_counter()
+    graph = FollowGraph.from_sorted_edges(edges, args.users)
+    built = time.perf_counter()
+    followers = graph.transpose()
+    transposed = time.perf_counter()
+    del edges
+
+    rand = random.Random(args.seed)
+    latencies = []
+    for user in rand.sample(range(args.users), args.sample):
+        user_started = time.perf_counter()
+        top_candidates(score_candidates(graph, followers, user))
+        latencies.append(time.perf_counter() - user_started)
+
+    results = {
+        'commit': get_commit(),
+        'users': args.users,
+        'edges': len(graph.targets),
+        'build_s': round(built - started, 3),
+        'transpose_s': round(transposed - built, 3),
+        'csr_mb': round((graph.nbytes() + followers.nbytes()) / 2 ** 20, 1),
+        'sets_mb': round(
+            (sets_size(graph) + sets_size(followers)) / 2 ** 20, 1
+        ),
+        'users_per_s': round(len(latencies) / sum(latencies), 1),
+        'suggestions': latency_summary(latencies),
+    }
+    print(results)
+    save_results(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
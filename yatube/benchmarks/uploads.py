@@ -0,0 +1,203 @@
+"""
+Benchmark of post image uploads: peak RSS and latency of the server.
+
+For every upload size a fresh server process is started with the WSGI
+app, the upload is streamed to /create/ over HTTP and the server reports
+its peak RSS. Sizes are in megabytes of noise JPEGs:
+
+    python -m benchmarks.uploads --sizes 5 20 50
+    python -m benchmarks.uploads --sizes 5 20 50 --max-upload-size 64
+"""
+import argparse
+import http.client
+import math
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+import uuid
+
+from .utils import (latency_summary, save_results, setup_django,
+                    temporary_database)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def make_jpeg(path, megabytes):
+    """Saves noise JPEG of about the given size, returns its size."""
+    from PIL import Image
+
+    # Noise JPEG of quality 95 takes about 1.2 bytes per pixel
+    pixels = megabytes * 1024 * 1024 / 1.2
+    width = int(math.sqrt(pixels * 4 / 3))
+    height = int(width * 3 / 4)
+    image = Image.frombytes(
+        'RGB', (width, height), os.urandom(width * height * 3)
+    )
+    image.save(path, 'JPEG', quality=95)
+    return os.path.getsize(path)
+
+
+def seed():
+    """Creates user and returns cookies of its session."""
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.middleware.csrf import _get_new_csrf_token
+    from django.test import Client
+
+    call_command('migrate', verbosity=0)
+    user = get_user_model().objects.create_user(username='bench')
+    client = Client()
+    client.force_login(user)
+    return {
+        'sessionid': client.cookies['sessionid'].value,
+        'csrftoken': _get_new_csrf_token(),
+    }
+
+
+def get_rss():
+    """
+    Returns current and peak RSS of the process in KB. Peak is read
+    from /proc, because ru_maxrss is inherited from the parent on exec.
+    """
+    try:
+        with open('/proc/self/status') as file:
+            status = dict(
+                line.split(':', 1) for line in file if ':' in line
+            )
+        return int(status['VmRSS'].split()[0]), int(status['VmHWM'].split()[0])
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak, peak
+
+
+def serve(env, requests, max_upload_size, queue):
+    """Serves requests with the WSGI app and reports RSS in KB."""
+    setup_django(env)
+    from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    if max_upload_size:
+        settings.POST_IMAGE_MAX_UPLOAD_SIZE = max_upload_size * 1024 * 1024
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = make_server(
+        '127.0.0.1', 0, get_wsgi_application(), handler_class=QuietHandler
+    )
+    queue.put((server.server_port, get_rss()[0]))
+    for _ in range(requests):
+        server.handle_request()
+    queue.put(get_rss()[1])
+
+
+def upload(port, path, cookies):
+    """Streams the file as multipart form, returns status and latency."""
+    boundary = uuid.uuid4().hex
+    head = (
+        f'--{boundary}\r\n'
+        'Content-Disposition: form-data; name="text"\r\n\r\n'
+        'Пост с большой картинкой\r\n'
+        f'--{boundary}\r\n'
+        'Content-Disposition: form-data; name="image"; '
+        'filename="photo.jpg"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+
+    def body():
+        yield head
+        with open(path, 'rb') as file:
+            while True:
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        yield tail
+
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    started = time.perf_counter()
+    connection.request('POST', '/create/', body=body(), headers={
+        'Content-Type': f'multipart/form-data; boundary={boundary}',
+        'Content-Length': str(
+            len(head) + os.path.getsize(path) + len(tail)
+        ),
+        'Cookie': '; '.join(
+            f'{name}={value}' for name, value in cookies.items()
+        ),
+        'X-CSRFToken': cookies['csrftoken'],
+    })
+    response = connection.getresponse()
+    response.read()
+    latency = time.perf_counter() - started
+    connection.close()
+    return response.status, latency
+
+
+def run(env, path, repeat, max_upload_size, cookies):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(
+        target=serve, args=(env, repeat, max_upload_size, queue)
+    )
+    process.start()
+    port, baseline = queue.get()
+    statuses, latencies = [], []
+    for _ in range(repeat):
+        status, latency = upload(port, path, cookies)
+        statuses.append(status)
+        latencies.append(latency)
+    peak = queue.get()
+    process.join()
+    return {
+        'upload_bytes': os.path.getsize(path),
+        # 302 means the post was created, 200 shows the form with errors
+        'statuses': statuses,
+        'baseline_rss_mb': round(baseline / 1024, 1),
+        'peak_rss_mb': round(peak / 1024, 1),
+        'rss_growth_mb': round((peak - baseline) / 1024, 1),
+        'latency': latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 20, 50],
+                        help='upload sizes in megabytes')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='uploads of every size')
+    parser.add_argument('--max-upload-size', type=int,
+                        help='POST_IMAGE_MAX_UPLOAD_SIZE in megabytes')
+    parser.add_argument('--json', help='path to save results')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    env = temporary_database(directory)
+    env['YATUBE_MEDIA_ROOT'] = os.path.join(directory, 'media')
+    results = {'max_upload_size_mb': args.max_upload_size, 'sizes': {}}
+    try:
+        setup_django(env)
+        cookies = seed()
+        from django.db import connections
+        connections.close_all()
+        for size in args.sizes:
+            path = os.path.join(directory, f'{size}.jpg')
+            make_jpeg(path, size)
+            results['sizes'][size] = run(
+                env, path, args.repeat, args.max_upload_size, cookies
+            )
+            os.remove(path)
+            print(size, 'MB:', results['sizes'][size])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    save_results(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+
+import django
+
+
+def percentile(values, percent):
+    """Returns percentile of the values by nearest rank."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def latency_summary(latencies):
+    """Returns latency percentiles in milliseconds."""
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies, default=0) * 1000, 3),
+    }
+
+
+def setup_django(env=None):
+    """Applies environment and sets django up in the current process."""
+    os.environ.update(env or {})
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    django.setup()
+
+
+def temporary_database(directory=None):
+    """Returns environment with a fresh sqlite database path."""
+    directory = directory or tempfile.mkdtemp(prefix='yatube-bench-')
+    return {'YATUBE_DB_NAME': os.path.join(directory, 'db.sqlite3')}
+
+
+def save_results(results, path):
+    """Saves results as JSON if path is given."""
+    if path:
+        with open(path, 'w') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
@@ -0,0 +1,164 @@
+"""
+Two-tier cache backend: small in-process LRU in front of a shared cache.
+
+Entries are kept locally for at most LOCAL_TIMEOUT seconds, so a value
+changed by another process is seen with that delay. Keys starting with
+LOCAL_BYPASS_PREFIXES (e.g. invalidation stamps) are never kept locally.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+MISSING = object()
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location or options.get('SHARED', 'shared')
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.bypass_prefixes = tuple(options.get('LOCAL_BYPASS_PREFIXES', ()))
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version):
+        if key.startswith(self.bypass_prefixes):
+            return None
+        return self.make_key(key, version)
+
+    def _local_get(self, local_key):
+        if local_key is None:
+            return MISSING
+        with self._lock:
+            value, expires = self._local.get(local_key, (MISSING, 0))
+            if value is MISSING:
+                return MISSING
+            if expires < time.monotonic():
+                del self._local[local_key]
+                return MISSING
+            self._local.move_to_end(local_key)
+            return value
+
+    def _local_set(self, local_key, value, timeout=DEFAULT_TIMEOUT):
+        if local_key is None:
+            return
+        timeout = self.get_backend_timeout(timeout)
+        local_timeout = self.local_timeout
+        if timeout is not None:
+            local_timeout = min(local_timeout, timeout - time.time())
+        if local_timeout <= 0:
+            self._local_delete(local_key)
+            return
+        with self._lock:
+            self._local[local_key] = (value, time.monotonic() + local_timeout)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, local_key):
+        if local_key is None:
+            return
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        value = self._local_get(local_key)
+        if value is not MISSING:
+            self.stats['local_hits'] += 1
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            self.stats['misses'] += 1
+            return default
+        self.stats['shared_hits'] += 1
+        self._local_set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remote_keys = []
+        for key in keys:
+            value = self._local_get(self._local_key(key, version))
+            if value is MISSING:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+        self.stats['local_hits'] += len(found)
+        if remote_keys:
+            remote = self.shared.get_many(remote_keys, version=version)
+            self.stats['shared_hits'] += len(remote)
+            self.stats['misses'] += len(remote_keys) - len(remote)
+            for key, value in remote.items():
+                self._local_set(self._local_key(key, version), value)
+            found.update(remote)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(self._local_key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(self._local_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(self._local_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local_delete(self._local_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self._local_get(self._local_key(key, version)) is not MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def clear(self):
+        self.clear_local()
+        self.shared.clear()
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+def is_shared(cache):
+    """
+    Returns whether other processes see values set in the cache,
+    e.g. results of management commands.
+    """
+    if isinstance(cache, TwoTierCache):
+        return is_shared(cache.shared)
+    return not isinstance(cache, (LocMemCache, DummyCache))
@@ -0,0 +1,21 @@
+"""
+Tuning of sqlite connections.
+
+apply_sqlite_pragmas() is connected to connection_created and runs
+SQLITE_PRAGMAS on every new sqlite connection. With CONN_MAX_AGE the
+connections are reused between requests, so the statements run once
+per connection rather than once per request.
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Runs PRAGMA statements of SQLITE_PRAGMAS on a new connection."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
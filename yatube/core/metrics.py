@@ -0,0 +1,202 @@
+"""
+Per-request instrumentation: SQL queries, template and thumbnail time.
+
+record() collects timings of the code run inside it, timer(name) adds
+time of a block to the current record. MetricsMiddleware records every
+request, sends the timings in the Server-Timing header and keeps the
+latest METRICS_SAMPLES requests of every view for percentiles shown by
+the /metrics/ page. The middleware is removed at startup unless
+METRICS_ENABLED is set, and timer() costs one thread-local lookup when
+nothing is recorded.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+DB = 'db'
+TEMPLATE = 'template'
+THUMBNAIL = 'thumbnail'
+TIMERS = (DB, TEMPLATE, THUMBNAIL)
+QUANTILES = (0.5, 0.9, 0.99)
+
+_state = threading.local()
+_template_render = None
+
+
+class Recorder:
+    """Timings of one request, in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.timings = dict.fromkeys(TIMERS, 0.0)
+        self.running = set()
+
+    def add(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def execute(self, execute, sql, params, many, context):
+        """Execute wrapper of the database connections."""
+        self.queries += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(DB, time.perf_counter() - started)
+
+    def server_timing(self):
+        """Returns value of the Server-Timing header."""
+        metrics = [
+            f'{DB};dur={self.timings[DB] * 1000:.1f};'
+            f'desc="{self.queries} queries"'
+        ]
+        metrics.extend(
+            f'{name};dur={self.timings[name] * 1000:.1f}'
+            for name in TIMERS[1:]
+        )
+        metrics.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timer(name):
+    """Adds time of the block to the current record, if any."""
+    recorder = getattr(_state, 'recorder', None)
+    # Nested blocks (e.g. included templates) are counted once
+    if recorder is None or name in recorder.running:
+        yield
+        return
+    recorder.running.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - started)
+        recorder.running.discard(name)
+
+
+def install_template_timer():
+    """Times Template.render, patched once on the first record."""
+    global _template_render
+    if _template_render is not None:
+        return
+    _template_render = Template.render
+
+    def render(self, context):
+        with timer(TEMPLATE):
+            return _template_render(self, context)
+
+    Template.render = render
+
+
+@contextmanager
+def record():
+    """Records queries and timings of the block, yields the Recorder."""
+    install_template_timer()
+    recorder = Recorder()
+    previous = getattr(_state, 'recorder', None)
+    _state.recorder = recorder
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(recorder.execute)
+                )
+            yield recorder
+    finally:
+        recorder.total = time.perf_counter() - recorder.started
+        _state.recorder = previous
+
+
+def get_samples_size():
+    """Returns number of the latest requests kept for every view."""
+    return getattr(settings, 'METRICS_SAMPLES', 1000)
+
+
+class ViewStats:
+    """Latest samples of the views kept in memory of the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.samples = defaultdict(
+                lambda: deque(maxlen=get_samples_size())
+            )
+
+    def add(self, view, recorder):
+        sample = (recorder.total, recorder.queries) + tuple(
+            recorder.timings[name] for name in TIMERS
+        )
+        with self._lock:
+            self.requests[view] += 1
+            self.samples[view].append(sample)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: (self.requests[view], list(samples))
+                for view, samples in self.samples.items()
+            }
+
+
+stats = ViewStats()
+
+
+def percentile(values, quantile):
+    """Returns nearest-rank percentile of the sorted values."""
+    return values[max(math.ceil(quantile * len(values)) - 1, 0)]
+
+
+def render_metrics():
+    """Returns percentiles of the views in Prometheus text format."""
+    names = (
+        'duration_seconds', 'queries', 'db_seconds', 'template_seconds',
+        'thumbnail_seconds',
+    )
+    lines = []
+    snapshot = sorted(stats.snapshot().items())
+    for position, name in enumerate(names):
+        metric = f'yatube_view_{name}'
+        lines.append(f'# TYPE {metric} summary')
+        for view, (requests, samples) in snapshot:
+            values = sorted(sample[position] for sample in samples)
+            for quantile in QUANTILES:
+                lines.append(
+                    f'{metric}{{view="{view}",quantile="{quantile}"}} '
+                    f'{percentile(values, quantile):g}'
+                )
+            lines.append(f'{metric}_count{{view="{view}"}} {requests}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class MetricsMiddleware:
+    """Records every request when METRICS_ENABLED is set."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record() as recorder:
+            response = self.get_response(request)
+        stats.add(get_view_name(request), recorder)
+        response['Server-Timing'] = recorder.server_timing()
+        return response
@@ -0,0 +1,60 @@
+"""
+Concurrent independent queries of a view.
+
+Django 2.2 has no async views, so a view runs its independent queries
+through gather() instead: the calls go to a pool of QUERY_WORKERS
+threads, each with its own database connection, and the view waits for
+all of them. Database drivers release the GIL while a query runs, so
+the queries overlap. With QUERY_WORKERS = 0 the calls run one by one
+in the request thread.
+
+Pool threads handle their connections like request threads do: the
+ones past CONN_MAX_AGE or broken are closed around every call.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import routers
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_workers():
+    return getattr(settings, 'QUERY_WORKERS', 0)
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_workers(), thread_name_prefix='queries'
+            )
+    return _executor
+
+
+def run(state, call):
+    close_old_connections()
+    try:
+        return routers.run_with_state(state, call)
+    finally:
+        close_old_connections()
+
+
+def gather(*calls):
+    """Runs the callables concurrently, returns their results in order."""
+    if not get_workers() or len(calls) < 2:
+        return [call() for call in calls]
+    # Pool threads route reads like the request thread
+    state = routers.get_state()
+    futures = [
+        get_executor().submit(run, state, call)
+        for call in calls[1:]
+    ]
+    results = [calls[0]()]
+    results.extend(future.result() for future in futures)
+    return results
@@ -0,0 +1,134 @@
+"""
+Routing of listing reads to database replicas.
+
+Views wrapped in replica_reads() read models of REPLICA_APPS from one of
+DATABASE_REPLICAS, everything else reads and writes the primary. A
+request that writes gets a cookie pinning reads of the user to the
+primary for REPLICA_PIN_SECONDS, so the user sees own writes while
+replicas catch up. Only writes to REPLICA_APPS pin: sessions, the
+database cache and the thumbnail store are written on plain reads too.
+Unsafe requests always read the primary.
+
+Writes bump cache stamps at once, so rows read from a lagging replica
+would be cached under fresh stamps: cached pages and fragments are
+filled from primary_reads() or not cached at all.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+PRIMARY = 'default'
+PIN_COOKIE = 'replica_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Sessions and the database cache always read the primary
+REPLICA_APPS = {'auth', 'posts'}
+
+_state = threading.local()
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def get_pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+@contextmanager
+def _override(**values):
+    previous = {name: getattr(_state, name, False) for name in values}
+    for name, value in values.items():
+        setattr(_state, name, value)
+    try:
+        yield _state
+    finally:
+        for name, value in previous.items():
+            setattr(_state, name, value)
+
+
+def get_state():
+    """Returns routing state of the current thread."""
+    return {
+        name: getattr(_state, name, False)
+        for name in ('replica', 'pinned')
+    }
+
+
+def reads_replica():
+    """Returns whether models of REPLICA_APPS are read from a replica."""
+    return bool(
+        get_replicas()
+        and getattr(_state, 'replica', False)
+        and not getattr(_state, 'pinned', False)
+    )
+
+
+@contextmanager
+def primary_reads():
+    """Reads the primary inside the block."""
+    with _override(pinned=True):
+        yield
+
+
+def run_with_state(state, call):
+    """Runs the call in another thread with the given routing state."""
+    with _override(**state):
+        return call()
+
+
+def replica_reads(view):
+    """Lets the view read from replicas."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with _override(replica=True):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reads_replica() and model._meta.app_label in REPLICA_APPS:
+            return random.choice(get_replicas())
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in REPLICA_APPS:
+            _state.written = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in get_replicas()
+
+
+class ReplicaMiddleware:
+    """
+    Pins reads to the primary for unsafe requests and for a while
+    after a write to REPLICA_APPS.
+    """
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+        with _override(pinned=pinned, written=False) as state:
+            response = self.get_response(request)
+            written = state.written
+        if written:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=get_pin_seconds(), httponly=True
+            )
+        return response
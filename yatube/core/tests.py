@@ -1,4 +1,40 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+from . import metrics, parallel
+from .cache import TwoTierCache
+from .routers import PIN_COOKIE
+
+User = get_user_model()
+
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-shared',
+    },
+    'two_tier': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 2,
+            'LOCAL_BYPASS_PREFIXES': ['stamp:'],
+        },
+    },
+}
 
 
 class ViewTestClass(TestCase):
@@ -7,3 +43,312 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        self.cache = TwoTierCache('shared', TWO_TIER_CACHES['two_tier'])
+        self.shared = caches['shared']
+        self.cache.clear()
+
+    def test_local_tier_serves_repeated_reads(self):
+        """Testing value is read from shared cache only once"""
+        self.shared.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.stats['shared_hits'], 1)
+        self.assertEqual(self.cache.stats['local_hits'], 1)
+
+    def test_local_tier_is_bounded_lru(self):
+        """Testing local tier evicts least recently used keys"""
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertEqual(set(self.cache._local), {
+            self.cache.make_key('a'), self.cache.make_key('c')
+        })
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {
+            'a': 1, 'b': 2, 'c': 3
+        })
+
+    def test_bypass_prefixes_always_read_shared(self):
+        """Testing stamps are never kept in local tier"""
+        self.cache.set('stamp:index', 'first')
+        self.shared.set('stamp:index', 'second')
+        self.assertEqual(self.cache.get('stamp:index'), 'second')
+
+    def test_delete_and_missing(self):
+        """Testing delete removes value from both tiers"""
+        self.cache.set('key', None)
+        self.assertIsNone(self.cache.get('key', 'default'))
+        self.cache.delete('key')
+        self.assertEqual(self.cache.get('key', 'default'), 'default')
+        self.assertIsNone(self.shared.get('key'))
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        metrics.stats.clear()
+
+    def test_record_counts_queries_and_templates(self):
+        """Testing record collects queries and nested template time"""
+        with metrics.record() as recorder:
+            response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(recorder.queries, 0)
+        self.assertGreater(recorder.timings[metrics.DB], 0)
+        self.assertGreater(recorder.timings[metrics.TEMPLATE], 0)
+        self.assertLessEqual(
+            recorder.timings[metrics.TEMPLATE], recorder.total
+        )
+
+    def test_disabled_middleware_is_not_used(self):
+        """Testing requests are not recorded without METRICS_ENABLED"""
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(metrics.stats.snapshot(), {})
+        self.assertEqual(
+            Client().get(reverse('metrics')).status_code, 404
+        )
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_server_timing_and_percentiles(self):
+        """Testing middleware sends Server-Timing and view percentiles"""
+        client = Client()
+        url = reverse('posts:profile', args=('author',))
+        for _ in range(3):
+            response = client.get(url)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", template;dur=[\d.]+, '
+            r'thumbnail;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn(
+            'yatube_view_duration_seconds_count{view="posts:profile"} 3',
+            content
+        )
+        self.assertIn(
+            'yatube_view_queries{view="posts:profile",quantile="0.99"}',
+            content
+        )
+
+    @override_settings(METRICS_ENABLED=True, INTERNAL_IPS=[])
+    def test_metrics_page_is_internal(self):
+        """Testing metrics page is hidden from other addresses"""
+        self.assertEqual(Client().get(reverse('metrics')).status_code, 404)
+
+    def test_percentile(self):
+        """Testing nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(metrics.percentile(values, 0.5), 50)
+        self.assertEqual(metrics.percentile(values, 0.99), 99)
+        self.assertEqual(metrics.percentile([7], 0.9), 7)
+
+
+class SqlitePragmasTests(TestCase):
+    def pragma(self, db, name):
+        with db.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1024, 'temp_store': 2})
+    def test_pragmas_applied_to_new_connections(self):
+        """Testing SQLITE_PRAGMAS run on every new sqlite connection"""
+        new_connection = connection.copy()
+        try:
+            self.assertEqual(self.pragma(new_connection, 'cache_size'), -1024)
+            self.assertEqual(self.pragma(new_connection, 'temp_store'), 2)
+        finally:
+            new_connection.close()
+
+    def test_no_pragmas_by_default(self):
+        """Testing connections keep sqlite defaults without the profile"""
+        new_connection = connection.copy()
+        try:
+            self.assertEqual(self.pragma(new_connection, 'temp_store'), 0)
+        finally:
+            new_connection.close()
+
+
+@override_settings(QUERY_WORKERS=2)
+class ParallelQueriesTests(TransactionTestCase):
+    """Pool threads read rows committed by the test."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def test_gather_results_in_order(self):
+        """Testing gather returns results of the calls in order"""
+        self.assertEqual(parallel.gather(
+            lambda: Post.objects.count(),
+            lambda: User.objects.get(username='reader').pk,
+            lambda: Follow.objects.exists(),
+        ), [1, self.reader.pk, True])
+
+    def test_gather_reraises_errors(self):
+        """Testing errors of pool threads are raised in the caller"""
+        with self.assertRaises(User.DoesNotExist):
+            parallel.gather(
+                lambda: Post.objects.count(),
+                lambda: User.objects.get(username='stranger'),
+            )
+
+    def test_pages_with_parallel_queries(self):
+        """Testing views gathering queries render the same context"""
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertEqual(response.context['author'], self.author)
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+        self.assertTrue(response.context['following'])
+        response = client.get(reverse('posts:post_detail', args=(
+            self.post.pk,
+        )))
+        self.assertEqual(response.context['post_object'], self.post)
+        response = client.get(reverse('posts:profile', args=('stranger',)))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=3)
+class ReplicaRoutingTests(TransactionTestCase):
+    """The replica is a second sqlite file copied from the primary."""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        delattr(connections._connections, 'replica')
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.synced = Post.objects.create(
+            text='Старый пост', author=self.author
+        )
+        self.sync_replica()
+        self.lagging = Post.objects.create(
+            text='Новый пост', author=self.author
+        )
+
+    def sync_replica(self):
+        """Copies the primary into the replica file."""
+        for alias in ('default', 'replica'):
+            connections[alias].ensure_connection()
+        connections['default'].connection.backup(
+            connections['replica'].connection
+        )
+
+    def get_follower_client(self):
+        client = Client()
+        client.force_login(self.follower)
+        return client
+
+    def get_feed_posts(self, client):
+        response = client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_listing_reads_replica(self):
+        """Testing listing pages read from the replica"""
+        self.assertEqual(
+            self.get_feed_posts(self.get_follower_client()), [self.synced]
+        )
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.lagging.pk,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_views_read_primary(self):
+        """Testing views without replica_reads read from the primary"""
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(
+            reverse('posts:post_edit', args=(self.lagging.pk,))
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_writer_reads_own_writes(self):
+        """Testing reads are pinned to the primary after a write"""
+        client = self.get_follower_client()
+        response = client.post(
+            reverse('posts:add_comment', args=(self.synced.pk,)),
+            {'text': 'Комментарий'}
+        )
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 3)
+        self.assertEqual(len(self.get_feed_posts(client)), 2)
+        self.assertEqual(
+            len(self.get_feed_posts(self.get_follower_client())), 1
+        )
+
+    def test_cached_pages_are_filled_from_primary(self):
+        """Testing cards and pages cached while the replica lags are fresh"""
+        self.synced.text = 'Исправленный пост'
+        self.synced.save()
+        response = self.get_follower_client().get(
+            reverse('posts:follow_index')
+        )
+        self.assertContains(response, 'Старый пост')
+        profile_url = reverse('posts:profile', args=(self.author.username,))
+        for _ in range(2):
+            response = Client().get(profile_url)
+            self.assertContains(response, 'Исправленный пост')
+            self.assertNotContains(response, 'Старый пост')
+            self.assertContains(response, 'Новый пост')
+
+    def test_cached_comments_are_filled_from_primary(self):
+        """Testing comments cached while the replica lags are fresh"""
+        Comment.objects.create(
+            post=self.synced, author=self.follower, text='Свежий комментарий'
+        )
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.synced.pk,))
+        )
+        self.assertContains(response, 'Свежий комментарий')
+
+    @override_settings(QUERY_WORKERS=2)
+    def test_pool_threads_read_replica(self):
+        """Testing queries gathered by a view keep routing to the replica"""
+        self.assertEqual(
+            self.get_feed_posts(self.get_follower_client()), [self.synced]
+        )
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'replica_test_cache',
+    }})
+    def test_cache_writes_do_not_pin(self):
+        """Testing reads filling the database cache do not pin the user"""
+        call_command('createcachetable', verbosity=0)
+        response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
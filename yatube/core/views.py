@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from .metrics import render_metrics
+
 
 def page_not_found(request, exception):
     """Renders 404 not found page"""
@@ -19,3 +23,17 @@ def permission_denied(request, exception):
 def csrf_failure(request, reason=''):
     """Renders 403 csrf failure page"""
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Returns percentiles of the views for INTERNAL_IPS and staff"""
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise Http404
+    if not (
+        request.user.is_staff
+        or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    ):
+        raise Http404
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .search import search_posts
 
 
 @admin.register(Post)
@@ -17,6 +18,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Searches text by the full-text index instead of LIKE."""
+        if not search_term:
+            return queryset, False
+        return search_posts(search_term, queryset), False
+
 
 models_list = [Comment, Follow, Group]
 for model in models_list:
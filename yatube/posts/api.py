@@ -0,0 +1,183 @@
+"""
+JSON read API of the listings and post pages.
+
+Views use the same querysets as posts.views, but serialize rows of
+values() without building model instances. Listings are paginated by
+cursor and answer conditional requests with ETag built from listing
+generations and Last-Modified from the latest post edit or generation
+change.
+"""
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from . import comments
+from .conditional import conditional, listing_freshness, post_freshness
+from .feed import FEED_CURSOR_KEYS, get_feed
+from .listings import INDEX, group_listing, profile_listing
+from .models import Group, Post, Timeline, User
+from .utils import CURSOR_KEYS, UNITS_ON_PAGE, cursor_paginate
+
+API_VERSION = 1
+MAX_PAGE_SIZE = 50
+POST_FIELDS = (
+    'pk', 'text', 'pub_date', 'author__username', 'group__slug', 'image',
+    'comments_count',
+)
+COMMENT_FIELDS = ('pk', 'text', 'created', 'author__username')
+
+
+def serialize_post(row):
+    return {
+        'id': row['pk'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+        'comments_count': row['comments_count'],
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['pk'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def comments_page_url(post_id, cursor):
+    """Returns URL of the JSON page of the post comments after the cursor."""
+    return '{}?{}'.format(
+        reverse('posts:comments', args=(post_id,)),
+        urlencode({'after': cursor, 'format': 'json'})
+    )
+
+
+def error(detail, status):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def get_page_size(request):
+    try:
+        size = int(request.GET.get('limit', UNITS_ON_PAGE))
+    except ValueError:
+        return UNITS_ON_PAGE
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def page_url(request, direction, cursor):
+    params = {direction: cursor}
+    if 'limit' in request.GET:
+        params['limit'] = get_page_size(request)
+    return f'{request.path}?{urlencode(params)}'
+
+
+def listing_response(request, posts_list, keys=CURSOR_KEYS):
+    """Returns cursor page of the posts as JSON."""
+    rows = posts_list.values(*dict.fromkeys(POST_FIELDS + keys))
+    page = cursor_paginate(rows, request, get_page_size(request), keys)
+    return JsonResponse({
+        'results': [serialize_post(row) for row in page],
+        'next': page.next_cursor and page_url(
+            request, 'after', page.next_cursor
+        ),
+        'previous': page.previous_cursor and page_url(
+            request, 'before', page.previous_cursor
+        ),
+    })
+
+
+def index_freshness(request):
+    return listing_freshness(
+        [INDEX], Post.objects.all(), API_VERSION, request.get_full_path()
+    )
+
+
+def group_freshness(request, slug):
+    return listing_freshness(
+        [group_listing(slug)],
+        Post.objects.filter(group__slug=slug),
+        API_VERSION, request.get_full_path()
+    )
+
+
+def profile_freshness(request, username):
+    return listing_freshness(
+        [profile_listing(username)],
+        Post.objects.filter(author__username=username),
+        API_VERSION, request.get_full_path()
+    )
+
+
+def follow_freshness(request):
+    if not request.user.is_authenticated:
+        return None, None
+    # Edits bump the index, follows bump profile of the follower
+    return listing_freshness(
+        [INDEX, profile_listing(request.user.username)],
+        Timeline.objects.filter(user=request.user),
+        API_VERSION, request.get_full_path(), request.user.pk,
+        field='pub_date'
+    )
+
+
+def api_post_freshness(request, post_id):
+    return post_freshness(post_id, API_VERSION, request.get_full_path())
+
+
+@conditional(index_freshness)
+def index(request):
+    """Returns page of all posts"""
+    return listing_response(request, Post.objects.all())
+
+
+@conditional(group_freshness)
+def group_posts(request, slug):
+    """Returns page of the group posts"""
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return error('Группа не найдена', 404)
+    return listing_response(request, group.posts.all())
+
+
+@conditional(profile_freshness)
+def profile(request, username):
+    """Returns page of the author posts"""
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error('Пользователь не найден', 404)
+    return listing_response(request, author.posts.all())
+
+
+@conditional(follow_freshness, vary_on_cookie=True)
+def follow_index(request):
+    """Returns page of the current user follow feed"""
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация', 401)
+    return listing_response(
+        request, get_feed(request.user), keys=FEED_CURSOR_KEYS
+    )
+
+
+@conditional(api_post_freshness)
+def post_detail(request, post_id):
+    """
+    Returns the post with the first page of its comments,
+    next pages are linked by comments_next
+    """
+    post = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if post is None:
+        return error('Пост не найден', 404)
+    page = comments.first_page(
+        comments.get_comments(post_id).values(*COMMENT_FIELDS)
+    )
+    data = serialize_post(post)
+    data['comments'] = [serialize_comment(row) for row in page]
+    data['comments_next'] = page.next_cursor and comments_page_url(
+        post_id, page.next_cursor
+    )
+    return JsonResponse(data)
@@ -0,0 +1,216 @@
+"""
+Streaming import and export of posts, comments and follows.
+
+Records are read and written one by one as JSON Lines or CSV, so memory
+does not depend on the number of rows. Users and groups are referenced
+by username and slug and resolved through in-memory maps loaded once.
+Posts and comments keep their ids, so comments of an imported archive
+refer to its posts.
+"""
+import csv
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .bulk import BATCH_SIZE, bulk_insert, explicit_dates, reset_sequences
+from .models import Comment, Follow, Group, Post, User
+
+JSONL = 'jsonl'
+CSV = 'csv'
+FORMATS = (JSONL, CSV)
+POSTS = 'posts'
+COMMENTS = 'comments'
+FOLLOWS = 'follows'
+# Exported columns and the values() lookups they are read from
+FIELDS = {
+    POSTS: {
+        'id': 'pk',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+    },
+    COMMENTS: {
+        'id': 'pk',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    FOLLOWS: {
+        'user': 'user__username',
+        'author': 'author__username',
+    },
+}
+MODELS = {POSTS: Post, COMMENTS: Comment, FOLLOWS: Follow}
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ArchiveError(ValueError):
+    """Record of the archive can not be imported."""
+
+
+def get_format(path, default=JSONL):
+    """Returns format by extension of the path."""
+    if path and path.endswith('.csv'):
+        return CSV
+    return default
+
+
+def read_records(file, file_format):
+    """Yields records of the file as dicts."""
+    if file_format == CSV:
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_records(file, file_format, kind, rows):
+    """Writes rows of values() as records, returns number of rows."""
+    fields = FIELDS[kind]
+    written = 0
+    if file_format == CSV:
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([
+                '' if row[lookup] is None else row[lookup]
+                for lookup in fields.values()
+            ])
+            written += 1
+        return written
+    for row in rows:
+        # str() keeps microseconds of dates, unlike DjangoJSONEncoder
+        file.write(json.dumps(
+            {field: row[lookup] for field, lookup in fields.items()},
+            ensure_ascii=False, default=str
+        ))
+        file.write('\n')
+        written += 1
+    return written
+
+
+def export_rows(kind, chunk_size=EXPORT_CHUNK_SIZE):
+    """Returns rows of the kind read from database by chunks."""
+    return MODELS[kind].objects.order_by('pk').values(
+        *FIELDS[kind].values()
+    ).iterator(chunk_size=chunk_size)
+
+
+class Importer:
+    """Turns records into model objects using lookup maps."""
+
+    def __init__(self, create_missing=False):
+        self.create_missing = create_missing
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.created = {'users': 0, 'groups': 0}
+
+    def get_user_id(self, username):
+        if username not in self.users:
+            if not self.create_missing:
+                raise ArchiveError(f'Unknown user {username!r}')
+            user = User(username=username)
+            user.set_unusable_password()
+            user.save()
+            self.users[username] = user.pk
+            self.created['users'] += 1
+        return self.users[username]
+
+    def get_group_id(self, slug):
+        if not slug:
+            return None
+        if slug not in self.groups:
+            if not self.create_missing:
+                raise ArchiveError(f'Unknown group {slug!r}')
+            group = Group.objects.create(
+                title=slug, slug=slug, description=''
+            )
+            self.groups[slug] = group.pk
+            self.created['groups'] += 1
+        return self.groups[slug]
+
+    def get_date(self, value):
+        if not value:
+            return timezone.now()
+        date = parse_datetime(value)
+        if date is None:
+            raise ArchiveError(f'Wrong date {value!r}')
+        if timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        return date
+
+    def make_post(self, record):
+        pub_date = self.get_date(record.get('pub_date'))
+        return Post(
+            pk=record.get('id') or None,
+            text=record['text'],
+            pub_date=pub_date,
+            updated_at=pub_date,
+            author_id=self.get_user_id(record['author']),
+            group_id=self.get_group_id(record.get('group')),
+            image=record.get('image') or '',
+        )
+
+    def make_comment(self, record):
+        return Comment(
+            pk=record.get('id') or None,
+            post_id=record['post'],
+            author_id=self.get_user_id(record['author']),
+            text=record['text'],
+            created=self.get_date(record.get('created')),
+        )
+
+    def make_follow(self, record):
+        return Follow(
+            user_id=self.get_user_id(record['user']),
+            author_id=self.get_user_id(record['author']),
+        )
+
+    def make_objects(self, kind, records):
+        make = {
+            POSTS: self.make_post,
+            COMMENTS: self.make_comment,
+            FOLLOWS: self.make_follow,
+        }[kind]
+        records = iter(records)
+        number = 0
+        while True:
+            number += 1
+            try:
+                # Malformed lines fail when the record is read
+                record = next(records)
+            except StopIteration:
+                return
+            except (ValueError, csv.Error) as error:
+                raise ArchiveError(f'Record {number}: unreadable, {error}')
+            try:
+                yield make(record)
+            except ArchiveError as error:
+                raise ArchiveError(f'Record {number}: {error}')
+            except (KeyError, ValueError) as error:
+                raise ArchiveError(f'Record {number}: wrong {error}')
+
+
+def import_records(kind, records, batch_size=BATCH_SIZE,
+                   create_missing=False):
+    """
+    Inserts records of the kind by batches.
+    Returns number of inserted rows and Importer with created users
+    and groups.
+    """
+    importer = Importer(create_missing)
+    model = MODELS[kind]
+    with explicit_dates(Post, Comment):
+        inserted = bulk_insert(
+            model, importer.make_objects(kind, records), batch_size,
+            # Follows already present in the database are skipped
+            ignore_conflicts=kind == FOLLOWS
+        )
+    if kind != FOLLOWS:
+        reset_sequences(model)
+    return inserted, importer
@@ -0,0 +1,99 @@
+"""
+Helpers of bulk loads bypassing model signals.
+
+bulk_create does not send post_save, so after a load the denormalized
+data kept by signals (counters, timelines, search index, cached pages)
+is rebuilt once by refresh_after_bulk_load().
+"""
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import counters, feed, ranking
+from .models import Comment, Post
+from .search import get_backend
+
+BATCH_SIZE = 1000
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Lets bulk_create keep given values of auto_now(_add) fields."""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def insert_batch(model, batch, ignore_conflicts=False):
+    with transaction.atomic():
+        return len(model.objects.bulk_create(
+            batch, ignore_conflicts=ignore_conflicts
+        ))
+
+
+def bulk_insert(model, objects, batch_size=BATCH_SIZE,
+                ignore_conflicts=False):
+    """
+    Inserts objects by batches, each in its own transaction.
+    Returns number of inserted rows.
+    """
+    inserted = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            inserted += insert_batch(model, batch, ignore_conflicts)
+            batch = []
+    if batch:
+        inserted += insert_batch(model, batch, ignore_conflicts)
+    return inserted
+
+
+def reset_sequences(*models):
+    """Moves id sequences past the ids inserted explicitly."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def touch_commented_posts():
+    """Moves edit time of the posts to their latest comments."""
+    latest_comment = Subquery(Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by('-created').values('created')[:1])
+    Post.objects.update(updated_at=Greatest(
+        F('updated_at'), Coalesce(latest_comment, F('updated_at'))
+    ))
+
+
+def refresh_after_bulk_load():
+    """
+    Rebuilds counters, edit times, timelines and the search index,
+    drops cached pages and ranks trending posts. Returns numbers of
+    rebuilt rows by name.
+    """
+    touch_commented_posts()
+    refreshed = {
+        'users': counters.recount(),
+        'timeline': feed.rebuild(),
+        'search': get_backend().rebuild(),
+    }
+    cache.clear()
+    refreshed['trending'] = ranking.rebuild()
+    return refreshed
@@ -0,0 +1,76 @@
+"""
+Fragment cache of rendered post cards.
+
+Card is cached under post id and version stamps of the post,
+its author and its group. Signals bump the stamps on writes,
+so stale cards are never read again and expire by timeout.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from core.routers import reads_replica
+
+from .stamps import bump_stamps, get_stamps
+
+CARD_TEMPLATE = 'includes/post.html'
+POST = 'post'
+USER = 'user'
+GROUP = 'group'
+
+
+def get_card_timeout():
+    """Returns timeout of the cached card in seconds."""
+    return getattr(settings, 'POST_CARD_TIMEOUT', 60 * 60 * 24)
+
+
+def version_key(model, pk):
+    return f'card_version:{model}:{pk}'
+
+
+def bump_version(model, pk):
+    """Makes all cached cards depending on the object stale."""
+    bump_stamps([version_key(model, pk)])
+
+
+def get_dependencies(post):
+    return (
+        version_key(POST, post.pk),
+        version_key(USER, post.author_id),
+        version_key(GROUP, post.group_id),
+    )
+
+
+def card_key(post, versions, comments_count=True):
+    stamps = '.'.join(versions[key] for key in get_dependencies(post))
+    kind = 'post_card' if comments_count else 'post_card_short'
+    return f'{kind}:{post.pk}:{stamps}'
+
+
+def render_cards(posts, comments_count=True):
+    """
+    Returns list of rendered cards of the posts, without comments
+    counter if comments_count is false.
+    Uses two cache round trips for any number of posts. Cards of posts
+    read from a replica are not cached: the rows may be older than
+    the versions.
+    """
+    posts = list(posts)
+    if not posts:
+        return []
+    versions = get_stamps(list({
+        key for post in posts for key in get_dependencies(post)
+    }))
+    keys = [card_key(post, versions, comments_count) for post in posts]
+    cards = cache.get_many(keys)
+    rendered = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            rendered[key] = render_to_string(CARD_TEMPLATE, {
+                'post': post, 'comments_count': comments_count,
+            })
+    if rendered:
+        if not reads_replica():
+            cache.set_many(rendered, get_card_timeout())
+        cards.update(rendered)
+    return [cards[key] for key in keys]
@@ -0,0 +1,81 @@
+"""
+Comments of a post paginated by cursor over (created, id).
+
+post_detail shows the first page rendered from cache stored under
+the comments version of the post, which signals bump on comment
+writes. Further pages are loaded by the comments view as HTML
+fragments or JSON.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.routers import primary_reads
+
+from .models import Comment
+from .stamps import bump_stamps, get_stamps
+from .utils import CursorPage, cursor_paginate
+
+COMMENT_CURSOR_KEYS = ('created', 'pk')
+COMMENTS_TEMPLATE = 'posts/includes/comments.html'
+
+
+def get_page_size():
+    """Returns number of comments on a page."""
+    return getattr(settings, 'COMMENTS_PAGE_SIZE', 20)
+
+
+def get_comments_timeout():
+    """Returns timeout of the cached first page in seconds."""
+    return getattr(settings, 'COMMENTS_CACHE_TIMEOUT', 60 * 60)
+
+
+def version_key(post_id):
+    return f'comments_version:{post_id}'
+
+
+def bump_version(post_id):
+    """Makes cached first page of the post comments stale."""
+    bump_stamps([version_key(post_id)])
+
+
+def get_comments(post_id):
+    return Comment.objects.filter(post_id=post_id)
+
+
+def get_page(comments, request):
+    """Returns page of the comments chosen by ?after=<cursor>."""
+    return cursor_paginate(
+        comments, request, get_page_size(), COMMENT_CURSOR_KEYS
+    )
+
+
+def first_page(comments):
+    objects = list(comments.order_by('-created', '-pk')[:get_page_size() + 1])
+    return CursorPage(
+        objects[:get_page_size()], len(objects) > get_page_size(), False,
+        COMMENT_CURSOR_KEYS
+    )
+
+
+def render_page(post_id, page):
+    return render_to_string(
+        COMMENTS_TEMPLATE, {'post_id': post_id, 'comments': page}
+    )
+
+
+def render_first_page(post_id):
+    """Returns rendered first page of the post comments."""
+    key = version_key(post_id)
+    cache_key = f'comments_page:{post_id}:{get_stamps([key])[key]}'
+    html = cache.get(cache_key)
+    if html is None:
+        # Cached under the new version, so not read from a lagging replica
+        with primary_reads():
+            page = first_page(
+                get_comments(post_id).select_related('author')
+            )
+        html = render_page(post_id, page)
+        cache.set(cache_key, html, get_comments_timeout())
+    return mark_safe(html)
@@ -0,0 +1,116 @@
+"""
+Conditional GET for views with cheap freshness tokens.
+
+Freshness function gets view arguments and returns (etag, last_modified)
+computed from cache stamps and one small query, so 304 Not Modified is
+answered without running the view. Post.updated_at changes on creation,
+edits, new images and comments, while deletions, moves between groups,
+unfollows and author changes only bump stamps. So Last-Modified is the
+latest of the edit times and the creation times of the stamps.
+"""
+import calendar
+import hashlib
+from functools import wraps
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import cards
+from .listings import generation_key, profile_listing
+from .models import Post
+from .stamps import get_stamps, stamp_time
+
+
+def make_etag(*parts):
+    """Returns quoted ETag hashed from the parts."""
+    raw = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def last_modified(date, stamps):
+    """Returns the latest of the date and creation times of the stamps."""
+    return max(
+        [stamp_time(stamp) for stamp in stamps]
+        + ([date] if date is not None else []),
+        default=None
+    )
+
+
+def listing_freshness(listings, posts_list, *parts, field='updated_at'):
+    """
+    Returns ETag of the listing generations and the parts,
+    and the latest of the field of the posts and the generations.
+    """
+    keys = [generation_key(listing) for listing in listings]
+    stamps = get_stamps(keys)
+    latest_date = posts_list.aggregate(latest=Max(field))['latest']
+    etag = make_etag(latest_date, *parts, *(stamps[key] for key in keys))
+    return etag, last_modified(latest_date, stamps.values())
+
+
+def post_freshness(post_id, *parts):
+    """
+    Returns ETag of the post, its author and group versions
+    and the parts, and the latest of the edit time and the versions.
+    """
+    post = Post.objects.filter(pk=post_id).values(
+        'updated_at', 'author_id', 'group_id', 'author__username'
+    ).first()
+    if post is None:
+        return None, None
+    keys = [
+        cards.version_key(cards.POST, post_id),
+        cards.version_key(cards.USER, post['author_id']),
+        cards.version_key(cards.GROUP, post['group_id']),
+        # Page shows posts counter of the author
+        generation_key(profile_listing(post['author__username'])),
+    ]
+    stamps = get_stamps(keys)
+    etag = make_etag(
+        post['updated_at'], *parts, *(stamps[key] for key in keys)
+    )
+    return etag, last_modified(post['updated_at'], stamps.values())
+
+
+def page_parts(request):
+    """
+    Returns parts of the HTML page ETag: rendered page depends
+    on the user and CSRF token besides the data.
+    """
+    return (
+        'html', request.get_full_path(), request.user.pk,
+        request.META.get('CSRF_COOKIE'),
+    )
+
+
+def conditional(freshness, vary_on_cookie=False):
+    """
+    Answers GET and HEAD with 304 when ETag or Last-Modified from
+    freshness(request, *args, **kwargs) match the request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag, last_modified = freshness(request, *args, **kwargs)
+            timestamp = None
+            if last_modified is not None:
+                timestamp = calendar.timegm(last_modified.utctimetuple())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                return response
+            if etag and not response.has_header('ETag'):
+                response['ETag'] = etag
+            if timestamp and not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(timestamp)
+            if vary_on_cookie:
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
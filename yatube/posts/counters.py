@@ -0,0 +1,75 @@
+"""
+Denormalized counters of users, groups and posts.
+
+Counters are changed with F() expressions from the write paths,
+recount() repairs them from the source tables.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def change_user_counter(user_id, field, delta):
+    """Changes counter of the user."""
+    UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+
+
+def change_group_counter(group_id, delta):
+    """Changes posts counter of the group."""
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta
+        )
+
+
+def change_post_counter(post_id, delta):
+    """Changes comments counter and edit time of the post."""
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta,
+        updated_at=timezone.now(),
+    )
+
+
+def count_subquery(queryset, field):
+    """Returns subquery counting queryset rows grouped by the field."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), Value(0))
+
+
+def recount_users(users=None):
+    """Recounts counters of the users, all users by default."""
+    users = User.objects.all() if users is None else users
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in users.filter(
+            stats__isnull=True
+        ).values_list('pk', flat=True).iterator()],
+        ignore_conflicts=True,
+    )
+    return UserStats.objects.filter(
+        user__in=users.values('pk')
+    ).update(
+        posts_count=count_subquery(Post.objects.all(), 'author'),
+        followers_count=count_subquery(Follow.objects.all(), 'author'),
+        following_count=count_subquery(Follow.objects.all(), 'user'),
+    )
+
+
+def recount():
+    """
+    Recounts all counters from source tables.
+    Returns number of recounted users.
+    """
+    Group.objects.update(
+        posts_count=count_subquery(Post.objects.all(), 'group')
+    )
+    Post.objects.update(
+        comments_count=count_subquery(Comment.objects.all(), 'post')
+    )
+    return recount_users()
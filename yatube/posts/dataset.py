@@ -0,0 +1,158 @@
+"""
+Synthetic dataset for benchmarks.
+
+Users, groups, posts, follows and comments are inserted by bulk_create.
+Authors are chosen by Zipf's law: the author of rank k writes posts
+and gets followers with probability proportional to 1 / k ** exponent.
+Images are a few generated JPEGs shared by a part of the posts.
+"""
+import io
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import bulk_insert, explicit_dates, refresh_after_bulk_load
+from .models import Comment, Follow, Group, Post, User
+
+PASSWORD = 'bench-password'
+IMAGES = 8
+IMAGE_SIZE = (1200, 800)
+WORDS = (
+    'кошка собака город море солнце дождь книга музыка дорога поезд '
+    'утро вечер друг работа отпуск горы лес река кофе чай фильм '
+    'новость история праздник весна осень зима лето письмо'
+).split()
+
+
+def zipf_weights(count, exponent):
+    """Returns cumulative weights of ranks 1..count by Zipf's law."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def make_text(rand, words):
+    return ' '.join(rand.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_images(rand, prefix):
+    """Saves gradient JPEGs into the storage, returns their names."""
+    from PIL import Image
+
+    names = []
+    for number in range(IMAGES):
+        gradient = Image.new('RGB', (2, 1))
+        gradient.putdata([
+            tuple(rand.randrange(256) for _ in range(3)) for _ in range(2)
+        ])
+        image = gradient.resize(IMAGE_SIZE, Image.BILINEAR)
+        content = io.BytesIO()
+        image.save(content, 'JPEG', quality=85)
+        names.append(default_storage.save(
+            f'posts/{prefix}-{number}.jpg', ContentFile(content.getvalue())
+        ))
+    return names
+
+
+def generate(users=1000, groups=20, posts=20000, follows=20, comments=50000,
+             image_share=0.1, exponent=1.1, days=365, prefix='user',
+             seed=0):
+    """
+    Inserts the dataset and rebuilds denormalized data.
+    follows is the mean number of authors followed by a user.
+    Returns numbers of inserted rows by name.
+    """
+    rand = random.Random(seed)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+    images = make_images(rand, prefix) if image_share and posts else []
+    with transaction.atomic(), explicit_dates(Post, Comment):
+        bulk_insert(User, (
+            User(username=f'{prefix}{number}', password=password,
+                 first_name=f'Пользователь {number}')
+            for number in range(users)
+        ))
+        user_ids = list(User.objects.filter(
+            username__in=[f'{prefix}{number}' for number in range(users)]
+        ).order_by('pk').values_list('pk', flat=True))
+        # Users created first are the most popular authors
+        weights = zipf_weights(len(user_ids), exponent)
+
+        bulk_insert(Group, (
+            Group(title=f'Группа {number}', slug=f'{prefix}-{number}',
+                  description=make_text(rand, 12))
+            for number in range(groups)
+        ))
+        group_ids = list(Group.objects.filter(
+            slug__in=[f'{prefix}-{number}' for number in range(groups)]
+        ).values_list('pk', flat=True))
+
+        def make_post():
+            pub_date = now - timedelta(seconds=rand.uniform(0, days * 86400))
+            image = ''
+            if images and rand.random() < image_share:
+                image = rand.choice(images)
+            return Post(
+                text=make_text(rand, rand.randint(5, 60)),
+                author_id=rand.choices(user_ids, cum_weights=weights)[0],
+                group_id=rand.choice(group_ids + [None]),
+                image=image,
+                pub_date=pub_date,
+                updated_at=pub_date,
+            )
+
+        last_post_id = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        inserted_posts = bulk_insert(
+            Post, (make_post() for _ in range(posts))
+        )
+        post_dates = list(Post.objects.filter(
+            pk__gt=last_post_id
+        ).values_list('pk', 'pub_date'))
+
+        follow_pairs = set()
+        for user_id in user_ids:
+            number = min(
+                len(user_ids) - 1,
+                round(rand.expovariate(1 / follows)) if follows else 0
+            )
+            authors = set()
+            while len(authors) < number:
+                author_id = rand.choices(user_ids, cum_weights=weights)[0]
+                if author_id != user_id:
+                    authors.add(author_id)
+            follow_pairs.update((user_id, author_id) for author_id in authors)
+        inserted_follows = bulk_insert(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in follow_pairs
+        ))
+
+        def make_comment():
+            post_id, pub_date = rand.choice(post_dates)
+            created = pub_date + (now - pub_date) * rand.random()
+            return Comment(
+                post_id=post_id,
+                author_id=rand.choice(user_ids),
+                text=make_text(rand, rand.randint(3, 20)),
+                created=created,
+            )
+
+        inserted_comments = bulk_insert(Comment, (
+            make_comment() for _ in range(comments if post_dates else 0)
+        ))
+    refresh_after_bulk_load()
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'posts': inserted_posts,
+        'images': len(images),
+        'follows': inserted_follows,
+        'comments': inserted_comments,
+    }
@@ -0,0 +1,144 @@
+"""
+Materialized follow feed (fan-out-on-write).
+
+Every new post is copied into Timeline rows of the author's followers,
+so the follow page reads only the rows of the current user.
+Authors with more than FEED_FANOUT_LIMIT followers are not fanned out:
+their posts are pulled into the feed at read time (hybrid mode).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Follow, Post, Timeline, UserStats
+
+FEED_BATCH_SIZE = 1000
+FEED_CURSOR_KEYS = ('feed_date', 'feed_post')
+
+
+def get_fanout_limit():
+    """Returns followers limit for fan-out-on-write, None disables it."""
+    return getattr(settings, 'FEED_FANOUT_LIMIT', None)
+
+
+def get_backfill_size():
+    """Returns how many latest posts are copied on follow."""
+    return getattr(settings, 'FEED_BACKFILL_SIZE', 500)
+
+
+def is_pull_author(author_id):
+    """Checks if author's posts are pulled at read time."""
+    limit = get_fanout_limit()
+    if limit is None:
+        return False
+    return UserStats.objects.filter(
+        user_id=author_id, followers_count__gt=limit
+    ).exists()
+
+
+def get_pull_authors(user):
+    """Returns ids of followed authors whose posts are pulled at read time."""
+    limit = get_fanout_limit()
+    if limit is None:
+        return []
+    return list(UserStats.objects.filter(
+        user__following__user=user, followers_count__gt=limit
+    ).values_list('user_id', flat=True))
+
+
+def fan_out_post(post):
+    """Copies new post into timelines of the author's followers."""
+    if is_pull_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    Timeline.objects.bulk_create(
+        (
+            Timeline(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=FEED_BATCH_SIZE
+    )
+
+
+def get_author_posts(author_id):
+    """Returns (id, pub_date) of the latest posts of the author."""
+    return list(Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:get_backfill_size()])
+
+
+def copy_posts(user_id, author_id, posts):
+    """Creates timeline rows of the user for the author's posts."""
+    return len(Timeline.objects.bulk_create(
+        (
+            Timeline(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts
+        ),
+        batch_size=FEED_BATCH_SIZE
+    ))
+
+
+def backfill(user_id, author_id):
+    """Copies latest posts of the author into user's timeline."""
+    if is_pull_author(author_id):
+        return
+    with transaction.atomic():
+        trim(user_id, author_id)
+        copy_posts(user_id, author_id, get_author_posts(author_id))
+
+
+def trim(user_id, author_id):
+    """Removes posts of the author from user's timeline."""
+    Timeline.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild():
+    """
+    Rebuilds all timelines from Follow rows.
+    Returns number of created timeline rows.
+    """
+    created = 0
+    author_id, posts = None, []
+    follows = Follow.objects.order_by('author_id').values_list(
+        'author_id', 'user_id'
+    )
+    with transaction.atomic():
+        Timeline.objects.all().delete()
+        for follow_author_id, user_id in follows.iterator():
+            if follow_author_id != author_id:
+                author_id = follow_author_id
+                posts = (
+                    [] if is_pull_author(author_id)
+                    else get_author_posts(author_id)
+                )
+            created += copy_posts(user_id, author_id, posts)
+    return created
+
+
+def get_feed(user):
+    """
+    Returns posts queryset of the user's follow feed
+    annotated with FEED_CURSOR_KEYS.
+    """
+    pull_authors = get_pull_authors(user)
+    if not pull_authors:
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_post=F('timeline_entries__post'),
+        ).order_by('-feed_date', '-feed_post')
+    return Post.objects.filter(
+        Q(pk__in=Timeline.objects.filter(user=user).values('post'))
+        | Q(author__in=pull_authors)
+    ).annotate(feed_date=F('pub_date'), feed_post=F('pk'))
@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Comment, Post
+from .uploads import is_too_large, normalize_image, size_error
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +10,24 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Truncated upload is not given to Pillow at all
+        self.image_too_large = False
+        image = self.files.get(self.add_prefix('image'))
+        if image is not None and is_too_large(image):
+            self.files = self.files.copy()
+            del self.files[self.add_prefix('image')]
+            self.image_too_large = True
+
+    def clean_image(self):
+        if self.image_too_large:
+            raise size_error()
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            image = normalize_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,165 @@
+"""
+Write path of comments.
+
+save_comment() saves a comment at once, or with COMMENT_BUFFER_INTERVAL
+puts it into an in-process buffer. A background thread saves buffered
+comments every interval, or as soon as COMMENT_BUFFER_SIZE of them are
+queued, by one bulk_create in one transaction, and then does once per
+post what comment signals do for every comment: counters, cached cards,
+comment pages and listings. Buffered comments show up after the flush
+and are lost if the process dies before it.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+from . import cards, comments, counters, listings, ranking
+from .models import Comment, Post
+from .stamps import bump_stamps
+
+logger = logging.getLogger(__name__)
+
+
+def get_buffer_interval():
+    """Returns seconds between flushes, None saves comments at once."""
+    return getattr(settings, 'COMMENT_BUFFER_INTERVAL', None)
+
+
+def get_buffer_size():
+    """Returns number of queued comments flushed without waiting."""
+    return getattr(settings, 'COMMENT_BUFFER_SIZE', 500)
+
+
+def invalidate_commented_posts(post_ids):
+    """Makes cached cards, comment pages and listings of the posts stale."""
+    post_ids = set(post_ids)
+    bump_stamps([
+        key for post_id in post_ids for key in (
+            cards.version_key(cards.POST, post_id),
+            comments.version_key(post_id),
+        )
+    ])
+    listings.bump_listings(listings.get_commented_posts_listings(post_ids))
+
+
+class CommentBuffer:
+    """Queue of comments saved by a background thread."""
+
+    def __init__(self):
+        self._comments = []
+        self._lock = threading.Lock()
+        # Held while a batch is saved, so flush() waits for the batch
+        # taken by the thread and saves what is left
+        self._flush_lock = threading.Lock()
+        self._full = threading.Event()
+        self._thread = None
+
+    def add(self, comment):
+        with self._lock:
+            self._comments.append(comment)
+            queued = len(self._comments)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name='comment-buffer', daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.flush)
+        if queued >= get_buffer_size():
+            self._full.set()
+
+    def save_batch(self, batch):
+        """Saves the comments with post counters in one transaction."""
+        with transaction.atomic():
+            Comment.objects.bulk_create(batch)
+            for post_id, number in Counter(
+                comment.post_id for comment in batch
+            ).items():
+                counters.change_post_counter(post_id, number)
+
+    def requeue(self, batch):
+        """Puts comments back in front, the next flush retries them."""
+        with self._lock:
+            self._comments[:0] = batch
+
+    def drop_orphans(self, batch):
+        """Returns comments whose posts were not deleted meanwhile."""
+        existing = set(Post.objects.filter(
+            pk__in={comment.post_id for comment in batch}
+        ).values_list('pk', flat=True))
+        kept = [comment for comment in batch if comment.post_id in existing]
+        if len(kept) < len(batch):
+            logger.warning(
+                'Dropped %s buffered comments to deleted posts',
+                len(batch) - len(kept)
+            )
+        return kept
+
+    def save_one_by_one(self, batch):
+        """
+        Saves the comments separately, so a bad one does not hold the
+        others back. Returns the saved ones.
+        """
+        saved = []
+        for position, comment in enumerate(batch):
+            try:
+                self.save_batch([comment])
+            except IntegrityError:
+                logger.exception('Buffered comment was dropped')
+            except Exception:
+                self.requeue(batch[position:])
+                raise
+            else:
+                saved.append(comment)
+        return saved
+
+    def flush(self):
+        """Saves queued comments, returns their number."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._comments = self._comments, []
+            if not batch:
+                return 0
+            try:
+                batch = self.drop_orphans(batch)
+                self.save_batch(batch)
+            except IntegrityError:
+                batch = self.save_one_by_one(batch)
+            except Exception:
+                self.requeue(batch)
+                raise
+        if not batch:
+            return 0
+        post_ids = [comment.post_id for comment in batch]
+        invalidate_commented_posts(post_ids)
+        ranking.update_posts(Post.objects.filter(pk__in=set(post_ids)))
+        return len(batch)
+
+    def run(self):
+        while True:
+            self._full.wait(get_buffer_interval())
+            self._full.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(
+                    'Buffered comments were not saved, will retry'
+                )
+            finally:
+                close_old_connections()
+
+
+buffer = CommentBuffer()
+
+
+def save_comment(comment):
+    """Saves the comment at once or puts it into the buffer."""
+    if get_buffer_interval() is None:
+        with transaction.atomic():
+            comment.save()
+        return
+    buffer.add(comment)
@@ -0,0 +1,109 @@
+"""
+Generational cache of listing pages.
+
+Every listing (index, group, author profile) has a generation stamp.
+Cached pages are keyed by it, so writes bump only the generations
+of the affected listings instead of flushing the whole cache.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.views.decorators.cache import cache_page
+
+from core.routers import primary_reads
+
+from .models import Group, Post, User
+from .stamps import bump_stamps, get_stamps
+
+INDEX = 'index'
+
+
+def group_listing(slug):
+    return f'group:{slug}'
+
+
+def profile_listing(username):
+    return f'profile:{username}'
+
+
+def generation_key(listing):
+    return f'listing_generation:{listing}'
+
+
+def get_listing_timeout():
+    """Returns timeout of the cached listing page in seconds."""
+    return getattr(settings, 'LISTING_CACHE_TIMEOUT', 60 * 60)
+
+
+def bump_listings(listings):
+    """Makes cached pages of the listings stale."""
+    bump_stamps([generation_key(listing) for listing in set(listings)])
+
+
+def cache_listing(get_listing):
+    """
+    Caches view under generation of the listing.
+    get_listing gets view kwargs and returns listing name.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = generation_key(get_listing(**kwargs))
+            prefix = f'listing:{get_stamps([key])[key]}'
+            cached_view = cache_page(
+                get_listing_timeout(), key_prefix=prefix
+            )(view)
+            # Missed pages are cached under the new generation,
+            # so they are never rendered from a lagging replica
+            with primary_reads():
+                return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_author_listings(author_id, *group_ids):
+    """Returns profile of the author and listings of the groups."""
+    listings = [
+        profile_listing(username) for username in
+        User.objects.filter(pk=author_id).values_list('username', flat=True)
+    ]
+    listings.extend(
+        group_listing(slug) for slug in Group.objects.filter(
+            pk__in=[pk for pk in group_ids if pk is not None]
+        ).values_list('slug', flat=True)
+    )
+    return listings
+
+
+def get_post_listings(author_id, *group_ids):
+    """Returns listings showing posts of the author and the groups."""
+    return [INDEX, *get_author_listings(author_id, *group_ids)]
+
+
+def get_commented_post_listings(post_id):
+    """
+    Returns listings showing the post, except the index: every comment
+    on the site would flush it, so its cards show no comments counter.
+    """
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return []
+    return get_author_listings(post['author_id'], post['group_id'])
+
+
+def get_commented_posts_listings(post_ids):
+    """Returns listings showing any of the posts, except the index."""
+    posts = Post.objects.filter(pk__in=post_ids)
+    listings = [
+        profile_listing(username) for username in User.objects.filter(
+            posts__in=posts
+        ).values_list('username', flat=True).distinct()
+    ]
+    listings.extend(
+        group_listing(slug) for slug in Group.objects.filter(
+            posts__in=posts
+        ).values_list('slug', flat=True).distinct()
+    )
+    return listings
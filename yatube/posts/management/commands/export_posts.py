@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Streams posts, comments or follows to JSON Lines or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', choices=list(archive.FIELDS), default=archive.POSTS
+        )
+        parser.add_argument(
+            '--output', help='file to write, standard output by default'
+        )
+        parser.add_argument(
+            '--format', choices=archive.FORMATS,
+            help='by default csv for .csv files, otherwise jsonl'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=archive.EXPORT_CHUNK_SIZE,
+            help='rows fetched from the database at once'
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or archive.get_format(
+            options['output']
+        )
+        rows = archive.export_rows(options['kind'], options['chunk_size'])
+        started = time.monotonic()
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as file:
+                written = archive.write_records(
+                    file, file_format, options['kind'], rows
+                )
+            report = self.stdout
+        else:
+            # Records end with their own newlines
+            self.stdout.ending = ''
+            written = archive.write_records(
+                self.stdout, file_format, options['kind'], rows
+            )
+            # Standard output holds the data
+            report = self.stderr
+        seconds = time.monotonic() - started
+        report.write(self.style.SUCCESS(
+            f'Exported {written} {options["kind"]} in {seconds:.1f} s '
+            f'({written / max(seconds, 1e-6):.0f} rows/s)'
+        ))
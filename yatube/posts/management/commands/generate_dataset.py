@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates synthetic users, groups, posts, follows and comments '
+        'for benchmarks'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='mean number of authors followed by a user'
+        )
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--image-share', type=float, default=0.1,
+            help='share of posts with images'
+        )
+        parser.add_argument(
+            '--exponent', type=float, default=1.1,
+            help='exponent of Zipf distribution of author popularity'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='posts are published during the last days'
+        )
+        parser.add_argument(
+            '--prefix', default='user',
+            help='prefix of usernames, group slugs and image names'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = dataset.generate(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+            image_share=options['image_share'],
+            exponent=options['exponent'],
+            days=options['days'],
+            prefix=options['prefix'],
+            seed=options['seed'],
+        )
+        summary = ', '.join(
+            f'{count} {name}' for name, count in created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {summary} in {time.monotonic() - started:.1f} s'
+        ))
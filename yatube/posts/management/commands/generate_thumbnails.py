@@ -0,0 +1,79 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails, refresh_posts
+from posts.variants import generate_variants
+
+
+def generate_chunk(post_ids):
+    """
+    Creates missing thumbnails and image variants of the posts
+    and refreshes cached pages of the changed ones.
+    Returns numbers of created thumbnails and variants.
+    """
+    thumbnails = variants = 0
+    changed = []
+    for post in Post.objects.filter(pk__in=post_ids).only(
+        'pk', 'image', 'image_variants'
+    ):
+        created = generate_thumbnails(post), generate_variants(post)
+        if any(created):
+            changed.append(post.pk)
+        thumbnails += created[0]
+        variants += created[1]
+    refresh_posts(changed)
+    return thumbnails, variants
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates missing thumbnails and variants of post images '
+        'using process pool'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='number of worker processes, 0 works in this process'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='number of posts handled by one task'
+        )
+
+    def get_chunks(self, chunk_size):
+        post_ids = Post.objects.exclude(image='').order_by('pk').values_list(
+            'pk', flat=True
+        )
+        chunk = []
+        for post_id in post_ids.iterator():
+            chunk.append(post_id)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        chunks = list(self.get_chunks(options['chunk_size']))
+        if options['processes'] == 0:
+            results = [generate_chunk(chunk) for chunk in chunks]
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['processes'],
+                mp_context=multiprocessing.get_context('fork')
+            ) as executor:
+                results = list(executor.map(generate_chunk, chunks))
+        thumbnails = sum(result[0] for result in results)
+        variants = sum(result[1] for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {thumbnails} thumbnails and {variants} image variants '
+            f'in {time.monotonic() - started:.1f} s'
+        ))
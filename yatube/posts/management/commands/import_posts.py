@@ -0,0 +1,80 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import archive, bulk
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports posts, comments or follows from JSON Lines or CSV '
+        'by batches, each batch in its own transaction'
+    )
+    stealth_options = ('stdin',)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', help='file to read, standard input by default'
+        )
+        parser.add_argument(
+            '--kind', choices=list(archive.FIELDS), default=archive.POSTS
+        )
+        parser.add_argument(
+            '--format', choices=archive.FORMATS,
+            help='by default csv for .csv files, otherwise jsonl'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=bulk.BATCH_SIZE,
+            help='rows inserted by one query'
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='create unknown users and groups instead of failing'
+        )
+        parser.add_argument(
+            '--no-refresh', action='store_true',
+            help='do not rebuild counters, timelines and search index, '
+                 'e.g. before importing the next file'
+        )
+
+    def import_file(self, file, file_format, options):
+        try:
+            return archive.import_records(
+                options['kind'],
+                archive.read_records(file, file_format),
+                batch_size=options['batch_size'],
+                create_missing=options['create_missing'],
+            )
+        except (archive.ArchiveError, IntegrityError) as error:
+            raise CommandError(
+                f'{error}. Batches before the failed one are imported'
+            )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or archive.get_format(options['path'])
+        started = time.monotonic()
+        if options['path']:
+            with open(options['path'], encoding='utf-8', newline='') as file:
+                inserted, importer = self.import_file(
+                    file, file_format, options
+                )
+        else:
+            inserted, importer = self.import_file(
+                options.get('stdin', sys.stdin), file_format, options
+            )
+        seconds = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {inserted} {options["kind"]} in {seconds:.1f} s '
+            f'({inserted / max(seconds, 1e-6):.0f} rows/s), created '
+            f'{importer.created["users"]} users and '
+            f'{importer.created["groups"]} groups'
+        ))
+        if not options['no_refresh']:
+            started = time.monotonic()
+            bulk.refresh_after_bulk_load()
+            self.stdout.write(self.style.SUCCESS(
+                'Rebuilt counters, timelines and search index '
+                f'in {time.monotonic() - started:.1f} s'
+            ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds materialized follow feeds from Follow rows'
+
+    def handle(self, *args, **options):
+        created = feed.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Created {created} timeline rows')
+        )
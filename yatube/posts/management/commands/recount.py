@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Recounts denormalized counters of users, groups and posts'
+
+    def handle(self, *args, **options):
+        recounted = counters.recount()
+        self.stdout.write(
+            self.style.SUCCESS(f'Recounted counters of {recounted} users')
+        )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.cache import is_shared
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Computes "who to follow" suggestions of all users from the follow '
+        'graph loaded into memory, run it periodically'
+    )
+
+    def handle(self, *args, **options):
+        if not is_shared(caches['default']):
+            self.stderr.write(self.style.WARNING(
+                'The cache is local to this process, web servers will not '
+                'see the results. Use a shared cache (YATUBE_CACHE=file, db, '
+                'redis or memcached)'
+            ))
+        started = time.monotonic()
+        graph = suggestions.FollowGraph.from_follows()
+        updated = suggestions.update_suggestions(graph)
+        self.stdout.write(self.style.SUCCESS(
+            f'Suggested authors to {updated} users from '
+            f'{len(graph.targets)} follows in '
+            f'{time.monotonic() - started:.1f}s'
+        ))
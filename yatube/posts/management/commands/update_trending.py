@@ -0,0 +1,24 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.cache import is_shared
+from posts import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes cached trending lists of all posts and of every group, '
+        'run it periodically'
+    )
+
+    def handle(self, *args, **options):
+        if not is_shared(caches['default']):
+            self.stderr.write(self.style.WARNING(
+                'The cache is local to this process, web servers will not '
+                'see the results. Use a shared cache (YATUBE_CACHE=file, db, '
+                'redis or memcached)'
+            ))
+        ranked = ranking.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Ranked {ranked} recent posts')
+        )
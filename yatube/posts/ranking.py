@@ -0,0 +1,172 @@
+"""
+Trending posts ranked by time-decayed popularity.
+
+Popularity of a post is its comments plus TRENDING_FOLLOWER_WEIGHT
+times the log of the followers of its author, and its score halves
+every TRENDING_HALF_LIFE hours since publication. With the same decay
+for all posts their order never changes with time, so a post is ranked
+by the time-independent
+
+    log(1 + popularity) + pub_date * ln 2 / half_life
+
+Top TRENDING_SIZE lists of all posts and of every group published in
+the last TRENDING_WINDOW days are kept in cache. Comment, follow and
+post writes merge the changed posts into the cached lists; rebuild()
+recomputes all lists from one query and is run periodically by the
+update_trending command, which also repairs what merges miss (a post
+falling out of a list is not replaced until then). A request missing
+the lists rebuilds them under a cache lock; requests coming meanwhile
+show an empty list instead of ranking all posts again.
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Group, Post
+
+REBUILD_LOCK_KEY = 'trending:rebuild'
+# Lock outlives a rebuild of a process that died meanwhile
+REBUILD_LOCK_TIMEOUT = 60
+RANK_FIELDS = (
+    'pk', 'group__slug', 'pub_date', 'comments_count',
+    'author__stats__followers_count',
+)
+
+
+def get_half_life():
+    """Returns seconds in which a post score halves."""
+    return getattr(settings, 'TRENDING_HALF_LIFE', 24) * 60 * 60
+
+
+def get_window_start():
+    """Returns publication date of the oldest ranked posts."""
+    return timezone.now() - timedelta(
+        days=getattr(settings, 'TRENDING_WINDOW', 7)
+    )
+
+
+def get_size():
+    return getattr(settings, 'TRENDING_SIZE', 20)
+
+
+def list_key(slug=None):
+    if slug is None:
+        return 'trending:all'
+    return f'trending:group:{slug}'
+
+
+def get_rows(posts):
+    """Returns columns of the recent posts needed for ranks."""
+    rows = posts.filter(pub_date__gte=get_window_start()).values_list(
+        *RANK_FIELDS
+    )
+    return list(zip(*rows)) or [()] * len(RANK_FIELDS)
+
+
+def rank_columns(pub_dates, comments, followers):
+    """Returns ranks of the posts computed column by column."""
+    weight = getattr(settings, 'TRENDING_FOLLOWER_WEIGHT', 1.0)
+    decay = math.log(2) / get_half_life()
+    popularity = map(
+        lambda comments, followers: comments + weight * math.log1p(
+            followers or 0
+        ),
+        comments, followers
+    )
+    return [
+        math.log1p(value) + date.timestamp() * decay
+        for value, date in zip(popularity, pub_dates)
+    ]
+
+
+def ranked_entries(posts):
+    """Returns (slug, (rank, post id, timestamp)) of the recent posts."""
+    pks, slugs, pub_dates, comments, followers = get_rows(posts)
+    ranks = rank_columns(pub_dates, comments, followers)
+    timestamps = [date.timestamp() for date in pub_dates]
+    return zip(slugs, zip(ranks, pks, timestamps))
+
+
+def rebuild():
+    """Recomputes all cached lists, returns number of ranked posts."""
+    size = get_size()
+    entries = list(ranked_entries(Post.objects.all()))
+    by_group = defaultdict(list)
+    for slug, entry in entries:
+        if slug is not None:
+            by_group[slug].append(entry)
+    lists = {
+        list_key(slug): [] for slug in
+        Group.objects.values_list('slug', flat=True)
+    }
+    lists.update({
+        list_key(slug): heapq.nlargest(size, group_entries)
+        for slug, group_entries in by_group.items()
+    })
+    lists[list_key()] = heapq.nlargest(
+        size, (entry for _, entry in entries)
+    )
+    cache.set_many(lists, None)
+    return len(entries)
+
+
+def merge(entries, updates, min_timestamp):
+    """Returns top entries of the list with updated entries of posts."""
+    merged = {entry[1]: entry for entry in entries}
+    merged.update((entry[1], entry) for entry in updates)
+    return heapq.nlargest(get_size(), (
+        entry for entry in merged.values() if entry[2] >= min_timestamp
+    ))
+
+
+def update_posts(posts):
+    """Merges new ranks of the posts into cached lists."""
+    updates = defaultdict(list)
+    for slug, entry in ranked_entries(posts):
+        updates[list_key()].append(entry)
+        if slug is not None:
+            updates[list_key(slug)].append(entry)
+    if not updates:
+        return
+    # Missing lists are built by rebuild(), not from a few posts
+    lists = cache.get_many(list(updates))
+    min_timestamp = get_window_start().timestamp()
+    cache.set_many({
+        key: merge(entries, updates[key], min_timestamp)
+        for key, entries in lists.items()
+    }, None)
+
+
+def remove_from_group(post_id, group_id):
+    """Drops the post moved to another group from the list of the group."""
+    slug = Group.objects.filter(pk=group_id).values_list(
+        'slug', flat=True
+    ).first()
+    if slug is None:
+        return
+    key = list_key(slug)
+    entries = cache.get(key)
+    if entries:
+        cache.set(key, [entry for entry in entries if entry[1] != post_id],
+                  None)
+
+
+def get_trending(slug=None):
+    """Returns trending posts of the group or of all groups."""
+    entries = cache.get(list_key(slug))
+    if entries is None:
+        if cache.add(REBUILD_LOCK_KEY, True, REBUILD_LOCK_TIMEOUT):
+            try:
+                rebuild()
+            finally:
+                cache.delete(REBUILD_LOCK_KEY)
+        entries = cache.get(list_key(slug), [])
+    min_timestamp = get_window_start().timestamp()
+    pks = [pk for _, pk, timestamp in entries if timestamp >= min_timestamp]
+    posts = Post.objects.select_related('group', 'author').in_bulk(pks)
+    return [posts[pk] for pk in pks if pk in posts]
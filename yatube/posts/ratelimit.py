@@ -0,0 +1,37 @@
+"""
+Token bucket rate limits kept in cache.
+
+A bucket holds up to `number` tokens and gets `number` tokens back
+every `period` seconds. The bucket is read and written without a lock,
+so concurrent requests of one user may take a few extra tokens.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def get_comment_rate_limit():
+    """Returns (number, period) of comments of a user, None disables it."""
+    return getattr(settings, 'COMMENT_RATE_LIMIT', (10, 60))
+
+
+def bucket_key(scope, user_id):
+    return f'ratelimit:{scope}:{user_id}'
+
+
+def take_token(key, number, period):
+    """
+    Takes a token from the bucket.
+    Returns 0 if the token is taken, otherwise seconds until it is back.
+    """
+    now = time.time()
+    rate = number / period
+    tokens, updated = cache.get(key, (number, now))
+    tokens = min(number, tokens + (now - updated) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    # Expired bucket is a full one
+    cache.set(key, (tokens - 1, now), math.ceil(period))
+    return 0
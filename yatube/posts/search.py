@@ -0,0 +1,173 @@
+"""
+Full-text search over posts.
+
+The backend is chosen by the database: SQLite keeps stemmed post texts
+in the posts_post_fts FTS5 table synced by post signals, PostgreSQL
+uses to_tsvector('russian', text) with the GIN index from migrations.
+POST_SEARCH_BACKEND setting may name another backend class.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Post
+from .stemmer import stem_words
+
+SEARCH_CURSOR_KEYS = ('search_rank', 'pk')
+FTS_TABLE = 'posts_post_fts'
+REBUILD_CHUNK_SIZE = 1000
+
+
+class RawSubquery(RawSQL):
+    """
+    Raw SELECT for __in lookups: the lookup adds parentheses itself,
+    and SQLite treats IN ((SELECT ...)) as a single value.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def nothing_found(queryset):
+    """Returns empty result which can still be ordered by search_rank."""
+    return queryset.annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    ).none()
+
+
+def to_index_text(text):
+    """Returns text of the post as stems separated by spaces."""
+    return ' '.join(stem_words(text))
+
+
+class SqliteSearchBackend:
+    """FTS5 index of stemmed texts ranked by bm25."""
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post.pk, to_index_text(post.text)]
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self):
+        """Indexes all posts again, returns number of indexed posts."""
+        indexed = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            rows = Post.objects.values_list('pk', 'text').order_by('pk')
+            last_pk = 0
+            while True:
+                chunk = list(rows.filter(pk__gt=last_pk)[:REBUILD_CHUNK_SIZE])
+                if not chunk:
+                    break
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                    [(pk, to_index_text(text)) for pk, text in chunk]
+                )
+                indexed += len(chunk)
+                last_pk = chunk[-1][0]
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+            )
+        return indexed
+
+    def to_match(self, query):
+        """Returns FTS5 query matching all stems of the query."""
+        return ' '.join(
+            '"{}"'.format(word.replace('"', '""'))
+            for word in stem_words(query)
+        )
+
+    def search(self, queryset, query):
+        match = self.to_match(query)
+        if not match:
+            return nothing_found(queryset)
+        return queryset.filter(pk__in=RawSubquery(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [match]
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -rank FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = posts_post.id',
+            [match], output_field=FloatField()
+        ))
+
+
+class PostgresSearchBackend:
+    """
+    Search by to_tsvector('russian', text), index is kept
+    by PostgreSQL itself.
+    """
+    config = 'russian'
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def get_vector(self):
+        """
+        Returns to_tsvector(config, text) matching the index expression.
+        SearchVector wraps the column in COALESCE, so GIN index of the
+        migration would not be used.
+        """
+        from django.contrib.postgres.search import SearchVectorField
+
+        return Func(
+            Value(self.config), F('text'), function='to_tsvector',
+            output_field=SearchVectorField()
+        )
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        if not query.strip():
+            return nothing_found(queryset)
+        vector = self.get_vector()
+        search_query = SearchQuery(query, config=self.config)
+        return queryset.annotate(
+            search_vector=vector,
+            search_rank=SearchRank(vector, search_query),
+        ).filter(search_vector=search_query)
+
+
+BACKENDS = {
+    'sqlite': SqliteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """Returns search backend of the POST_SEARCH_BACKEND or database."""
+    path = getattr(settings, 'POST_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor not in BACKENDS:
+        raise ImproperlyConfigured(
+            f'No post search backend for {connection.vendor} database, '
+            f'set POST_SEARCH_BACKEND'
+        )
+    return BACKENDS[connection.vendor]()
+
+
+def search_posts(query, queryset=None):
+    """Returns posts matching the query annotated with search_rank."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    return get_backend().search(queryset, query)
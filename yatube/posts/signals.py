@@ -0,0 +1,244 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (cards, comments, counters, feed, listings, ranking, search,
+               suggestions)
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    """Creates counters row for the new user."""
+    if created and not kwargs.get('raw'):
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    """Remembers group of the edited post to move group counters."""
+    if instance.pk and not kwargs.get('raw'):
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    """Changes posts counters of the author and the group."""
+    if kwargs.get('raw'):
+        return
+    if created:
+        counters.change_user_counter(instance.author_id, 'posts_count', 1)
+        counters.change_group_counter(instance.group_id, 1)
+        return
+    old_group_id = getattr(instance, '_old_group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        counters.change_group_counter(old_group_id, -1)
+        counters.change_group_counter(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    """Changes posts counters of the author and the group."""
+    counters.change_user_counter(instance.author_id, 'posts_count', -1)
+    counters.change_group_counter(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    """Changes comments counter of the post."""
+    if created and not kwargs.get('raw'):
+        counters.change_post_counter(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    """Changes comments counter of the post."""
+    counters.change_post_counter(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    """Changes followers and following counters."""
+    if created and not kwargs.get('raw'):
+        counters.change_user_counter(instance.author_id, 'followers_count', 1)
+        counters.change_user_counter(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    """Changes followers and following counters."""
+    counters.change_user_counter(instance.author_id, 'followers_count', -1)
+    counters.change_user_counter(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Puts new post into followers timelines."""
+    if created and not kwargs.get('raw'):
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """Puts latest posts of the author into new follower timeline."""
+    if created and not kwargs.get('raw'):
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    """Removes posts of the author from former follower timeline."""
+    feed.trim(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    """Makes cached card of the post stale."""
+    cards.bump_version(cards.POST, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post_card(sender, instance, **kwargs):
+    """Makes cached card with comments counter stale."""
+    cards.bump_version(cards.POST, instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_post_comments(sender, instance, **kwargs):
+    """Makes cached first page of the post comments stale."""
+    comments.bump_version(instance.post_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_cards(sender, instance, **kwargs):
+    """Makes cached cards of the author posts stale."""
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return
+    cards.bump_version(cards.USER, instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    """Makes cached cards of the group posts stale."""
+    cards.bump_version(cards.GROUP, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_listings(sender, instance, **kwargs):
+    """Makes cached listings showing the post stale."""
+    listings.bump_listings(listings.get_post_listings(
+        instance.author_id,
+        instance.group_id,
+        getattr(instance, '_old_group_id', None),
+    ))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post_listings(sender, instance, **kwargs):
+    """Makes cached listings with comments counter stale."""
+    listings.bump_listings(
+        listings.get_commented_post_listings(instance.post_id)
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_listings(sender, instance, **kwargs):
+    """Makes cached profiles with follow counters stale."""
+    listings.bump_listings(
+        listings.profile_listing(username) for username in
+        User.objects.filter(
+            pk__in=[instance.user_id, instance.author_id]
+        ).values_list('username', flat=True)
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_listings(sender, instance, **kwargs):
+    """Makes cached listings with the user name stale."""
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return
+    user_listings = [listings.profile_listing(instance.username)]
+    if not kwargs.get('created'):
+        user_listings.append(listings.INDEX)
+    listings.bump_listings(user_listings)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_listings(sender, instance, **kwargs):
+    """Makes cached listings with the group stale."""
+    listings.bump_listings(
+        [listings.group_listing(instance.slug), listings.INDEX]
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Puts text of the post into the search index."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Removes the post from the search index."""
+    search.get_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def rank_commented_post(sender, instance, **kwargs):
+    """Updates trending rank of the post with changed comments counter."""
+    if kwargs.get('created') is False or kwargs.get('raw'):
+        return
+    ranking.update_posts(Post.objects.filter(pk=instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def rank_author_posts(sender, instance, **kwargs):
+    """Updates trending ranks of the author posts."""
+    if kwargs.get('raw'):
+        return
+    ranking.update_posts(Post.objects.filter(author_id=instance.author_id))
+
+
+@receiver(post_save, sender=Post)
+def rank_saved_post(sender, instance, created, **kwargs):
+    """Puts new post or post moved to another group into trending lists."""
+    if kwargs.get('raw'):
+        return
+    old_group_id = getattr(instance, '_old_group_id', instance.group_id)
+    if created or old_group_id != instance.group_id:
+        if old_group_id is not None and not created:
+            ranking.remove_from_group(instance.pk, old_group_id)
+        ranking.update_posts(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+def suggest_after_follow(sender, instance, created, **kwargs):
+    """Adds authors followed by the new author to suggestions."""
+    if created and not kwargs.get('raw'):
+        suggestions.change_friends_of_friends(
+            instance.user_id, instance.author_id, 1
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def suggest_after_unfollow(sender, instance, **kwargs):
+    """Removes authors followed by the former author from suggestions."""
+    suggestions.change_friends_of_friends(
+        instance.user_id, instance.author_id, -1
+    )
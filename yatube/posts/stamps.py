@@ -0,0 +1,49 @@
+"""
+Version stamps kept in cache.
+
+Cached data is stored under keys containing stamps of the objects
+it depends on. Replacing a stamp makes all such data stale at once.
+A stamp starts with its creation time, so it also tells when the data
+last changed.
+"""
+import time
+import uuid
+from datetime import datetime
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+def new_stamp():
+    return f'{int(time.time() * 1000):x}.{uuid.uuid4().hex[:12]}'
+
+
+def stamp_time(stamp):
+    """Returns creation time of the stamp."""
+    milliseconds, _, _ = stamp.partition('.')
+    try:
+        return datetime.fromtimestamp(
+            int(milliseconds, 16) / 1000, tz=timezone.utc
+        )
+    except ValueError:
+        # Stamps made before they carried the time
+        return timezone.now()
+
+
+def bump_stamps(keys):
+    """Replaces stamps of the keys."""
+    cache.set_many({key: new_stamp() for key in keys}, None)
+
+
+def get_stamps(keys):
+    """
+    Returns stamps for the keys.
+    Missing stamps are created, so evicted stamps never
+    resurrect the data cached before eviction.
+    """
+    stamps = cache.get_many(keys)
+    missing = {key: new_stamp() for key in keys if key not in stamps}
+    if missing:
+        cache.set_many(missing, None)
+        stamps.update(missing)
+    return stamps
@@ -0,0 +1,118 @@
+"""
+Snowball stemmer for Russian words.
+
+Follows the algorithm of snowballstem.org/algorithms/russian: endings
+are removed from the RV region, derivational ones from the R2 region.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-я]')
+
+PERFECTIVE_GERUND = ('в', 'вши', 'вшись')
+PERFECTIVE_GERUND_2 = ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись')
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE = ('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+    'ют', 'ны', 'ть', 'ешь', 'нно',
+)
+VERB_2 = (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+    'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+    'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+)
+DERIVATIONAL = ('ост', 'ость')
+SUPERLATIVE = ('ейш', 'ейше')
+
+
+def _region_start(word, start):
+    """Returns start of the region after first non-vowel after vowel."""
+    for i in range(start + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _match(part, endings, after_a_endings=()):
+    """
+    Returns the longest ending of the part or None.
+    after_a_endings match only after 'а' or 'я'.
+    """
+    found = max(
+        (ending for ending in endings + after_a_endings
+         if part.endswith(ending)),
+        key=len, default=None
+    )
+    if found in after_a_endings and not part[:-len(found)].endswith(
+        ('а', 'я')
+    ):
+        return None
+    return found
+
+
+def _cut(part, ending):
+    return part[:-len(ending)] if ending else part
+
+
+def stem(word):
+    """Returns stem of the russian word in lower case."""
+    word = word.lower().replace('ё', 'е')
+    rv_start = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS),
+        len(word)
+    )
+    r2_start = _region_start(word, _region_start(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    ending = _match(rv, PERFECTIVE_GERUND_2, PERFECTIVE_GERUND)
+    if ending:
+        rv = _cut(rv, ending)
+    else:
+        rv = _cut(rv, _match(rv, REFLEXIVE))
+        ending = _match(rv, ADJECTIVE)
+        if ending:
+            rv = _cut(rv, ending)
+            rv = _cut(rv, _match(rv, PARTICIPLE_2, PARTICIPLE))
+        else:
+            rv = _cut(rv, _match(rv, VERB_2, VERB) or _match(rv, NOUN))
+
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    rv = _cut(rv, _match(rv[max(0, r2_start - rv_start):], DERIVATIONAL))
+
+    ending = _match(rv, SUPERLATIVE + ('н', 'ь'))
+    if ending in SUPERLATIVE:
+        rv = _cut(rv, ending)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    elif ending == 'н' and rv.endswith('нн'):
+        rv = rv[:-1]
+    elif ending == 'ь':
+        rv = rv[:-1]
+    return prefix + rv
+
+
+def stem_words(text):
+    """
+    Returns stems of words of the text. Words without
+    cyrillic letters are only lowercased.
+    """
+    words = WORD_RE.findall(text.lower().replace('ё', 'е'))
+    return [
+        stem(word) if CYRILLIC_RE.search(word) else word for word in words
+    ]
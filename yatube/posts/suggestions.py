@@ -0,0 +1,254 @@
+"""
+"Who to follow" suggestions from the follow graph.
+
+Candidates for a user are authors followed by the authors the user
+follows (friends of friends, weighted by SUGGESTIONS_FOF_WEIGHT) and
+authors followed by other followers of those authors (co-follows,
+SUGGESTIONS_SAMPLE followers of every author are looked at).
+
+update_suggestions() loads all Follow rows once into FollowGraph, an
+array-backed CSR adjacency, and computes suggestions of every user
+without ORM joins; scores of the best candidates are cached per user.
+Follows and unfollows then change the friends-of-friends part of the
+cached scores of the user; co-follows wait for the next batch run.
+A user missing from the cache, e.g. when the batch ran with a cache of
+its own process, gets suggestions from the part of the graph around
+the user: followed authors are loaded by one query, follows of the
+user, of the authors and of their sampled followers by another.
+"""
+import heapq
+from array import array
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Q
+
+from .models import Follow, User
+from .search import RawSubquery
+
+CACHE_BATCH_SIZE = 1000
+# Cached candidates per shown suggestion, unfollows may drop some
+CANDIDATES_FACTOR = 3
+# SQLite limit of terms in a compound SELECT
+SAMPLE_BATCH_SIZE = 500
+
+
+def get_size():
+    """Returns number of shown suggestions."""
+    return getattr(settings, 'SUGGESTIONS_SIZE', 5)
+
+
+def get_fof_weight():
+    return getattr(settings, 'SUGGESTIONS_FOF_WEIGHT', 2)
+
+
+def get_sample():
+    return getattr(settings, 'SUGGESTIONS_SAMPLE', 20)
+
+
+def get_timeout():
+    return getattr(settings, 'SUGGESTIONS_TIMEOUT', 60 * 60 * 24 * 2)
+
+
+def suggestions_key(user_id):
+    return f'suggestions:{user_id}'
+
+
+class FollowGraph:
+    """
+    Directed graph in compressed sparse row form: neighbours of node n
+    are targets[offsets[n]:offsets[n + 1]]. Nodes are user ids, every
+    edge takes one C long instead of a Python object.
+    """
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_sorted_edges(cls, edges, size):
+        """Builds graph of `size` nodes from edges sorted by source."""
+        offsets = array('l', bytes(array('l').itemsize * (size + 1)))
+        targets = array('l')
+        for source, target in edges:
+            targets.append(target)
+            offsets[source + 1] += 1
+        for node in range(size):
+            offsets[node + 1] += offsets[node]
+        return cls(offsets, targets)
+
+    @classmethod
+    def from_follows(cls, chunk_size=10000):
+        """Builds graph of users to the authors they follow."""
+        size = (User.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        edges = Follow.objects.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id'
+        ).iterator(chunk_size=chunk_size)
+        return cls.from_sorted_edges(edges, size)
+
+    @property
+    def size(self):
+        return len(self.offsets) - 1
+
+    def neighbours(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def transpose(self):
+        """Returns graph with reversed edges, e.g. authors to followers."""
+        offsets = array('l', bytes(self.offsets.itemsize * (self.size + 1)))
+        for target in self.targets:
+            offsets[target + 1] += 1
+        for node in range(self.size):
+            offsets[node + 1] += offsets[node]
+        positions = offsets[:-1]
+        targets = array('l', bytes(self.targets.itemsize * len(self.targets)))
+        for source in range(self.size):
+            for target in self.neighbours(source):
+                targets[positions[target]] = source
+                positions[target] += 1
+        return FollowGraph(offsets, targets)
+
+    def nbytes(self):
+        return (
+            self.offsets.itemsize * len(self.offsets)
+            + self.targets.itemsize * len(self.targets)
+        )
+
+
+def score_candidates(graph, followers, user_id):
+    """Returns scores of candidate authors for the user."""
+    followed = graph.neighbours(user_id)
+    fof, co_follows = Counter(), Counter()
+    sample = get_sample()
+    for author in followed:
+        fof.update(graph.neighbours(author))
+        for follower in islice(followers.neighbours(author), sample):
+            if follower != user_id:
+                co_follows.update(graph.neighbours(follower))
+    scores = Counter({
+        author: count * get_fof_weight() for author, count in fof.items()
+    })
+    scores.update(co_follows)
+    for author in (user_id, *followed):
+        scores.pop(author, None)
+    return scores
+
+
+def top_candidates(scores):
+    """Returns [author id, score] of the best candidates."""
+    return [
+        [author, score] for author, score in heapq.nlargest(
+            get_size() * CANDIDATES_FACTOR, scores.items(),
+            key=lambda item: (item[1], -item[0])
+        )
+    ]
+
+
+def sampled_followers(authors):
+    """
+    Returns subquery of the first SUGGESTIONS_SAMPLE followers by id
+    of every author, as in transposed graph. Every author takes its own
+    LIMIT over the (author, user) index, so no follower is sorted.
+    """
+    term = (
+        f'SELECT * FROM (SELECT user_id FROM {Follow._meta.db_table} '
+        f'WHERE author_id = %s ORDER BY user_id LIMIT %s)'
+    )
+    return RawSubquery(
+        ' UNION ALL '.join([term] * len(authors)),
+        [param for author in authors for param in (author, get_sample())]
+    )
+
+
+def suggest(user_id):
+    """
+    Returns best candidates of the user scored like update_suggestions()
+    does, from follows of the user, the followed authors and the sampled
+    followers of those authors.
+    """
+    followed = list(Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    ))
+    if not followed:
+        return []
+    condition = Q(user_id=user_id) | Q(user_id__in=followed)
+    for start in range(0, len(followed), SAMPLE_BATCH_SIZE):
+        condition |= Q(user_id__in=sampled_followers(
+            followed[start:start + SAMPLE_BATCH_SIZE]
+        ))
+    # Sorted here, the OR of index searches would need a temp b-tree
+    edges = sorted(Follow.objects.filter(condition).values_list(
+        'user_id', 'author_id'
+    ))
+    if not edges:
+        return []
+    # Nodes are renumbered in order of ids, so samples stay the same
+    nodes = sorted({node for edge in edges for node in edge} | {user_id})
+    index = {node: position for position, node in enumerate(nodes)}
+    graph = FollowGraph.from_sorted_edges(
+        ((index[source], index[target]) for source, target in edges),
+        len(nodes)
+    )
+    scores = score_candidates(graph, graph.transpose(), index[user_id])
+    return top_candidates(Counter({
+        nodes[node]: score for node, score in scores.items()
+    }))
+
+
+def update_suggestions(graph=None):
+    """Caches suggestions of all following users, returns their number."""
+    graph = graph or FollowGraph.from_follows()
+    followers = graph.transpose()
+    batch = {}
+    updated = 0
+    for user_id in range(graph.size):
+        if graph.offsets[user_id] == graph.offsets[user_id + 1]:
+            continue
+        batch[suggestions_key(user_id)] = top_candidates(
+            score_candidates(graph, followers, user_id)
+        )
+        if len(batch) == CACHE_BATCH_SIZE:
+            cache.set_many(batch, get_timeout())
+            updated += len(batch)
+            batch = {}
+    cache.set_many(batch, get_timeout())
+    return updated + len(batch)
+
+
+def change_friends_of_friends(user_id, author_id, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) authors followed by the author
+    to cached suggestions of the user after a follow or an unfollow.
+    """
+    key = suggestions_key(user_id)
+    cached = cache.get(key)
+    if cached is None:
+        # Computed in full when the user opens the page
+        return
+    scores = Counter(dict(cached))
+    scores.pop(author_id, None)
+    candidates = Follow.objects.filter(user_id=author_id).exclude(
+        author_id=user_id
+    ).exclude(author__following__user_id=user_id).values_list(
+        'author_id', flat=True
+    )
+    for candidate in candidates:
+        if sign > 0 or candidate in scores:
+            scores[candidate] += sign * get_fof_weight()
+    cache.set(key, top_candidates(+scores), get_timeout())
+
+
+def get_suggestions(user):
+    """Returns suggested authors for the user, cached."""
+    key = suggestions_key(user.pk)
+    entries = cache.get(key)
+    if entries is None:
+        entries = suggest(user.pk)
+        cache.set(key, entries, get_timeout())
+    entries = entries[:get_size()]
+    if not entries:
+        return []
+    users = User.objects.in_bulk([author for author, _ in entries])
+    return [users[author] for author, _ in entries if author in users]
@@ -0,0 +1,247 @@
+"""
+RSS and Atom feeds of the index, groups and author profiles.
+
+Feeds are streamed: the document head, every item and the tail are
+written as separate chunks. Items are cached as XML fragments under
+the card versions of the post, so a new post renders only its own
+item. The whole document is cached under the listing generation,
+which signals bump when a post of the listing is created or edited.
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from . import cards
+from .conditional import conditional, listing_freshness
+from .listings import (INDEX, generation_key, get_listing_timeout,
+                       group_listing, profile_listing)
+from .models import Group, Post, User
+from .stamps import get_stamps
+
+ENCODING = 'utf-8'
+TITLE_WORDS = 8
+
+
+def get_feed_size():
+    """Returns number of the latest posts in a feed."""
+    return getattr(settings, 'POST_FEED_SIZE', 20)
+
+
+class StreamingFeedMixin:
+    """Writes the feed document in chunks instead of a single string."""
+
+    def __init__(self, *args, updated=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = updated
+
+    def latest_post_date(self):
+        return self.updated or super().latest_post_date()
+
+    def render(self, write):
+        buffer = StringIO()
+        write(SimplerXMLGenerator(buffer, ENCODING))
+        return buffer.getvalue()
+
+    def render_head(self):
+        return self.render(self.write_head)
+
+    def render_tail(self):
+        return self.render(self.write_tail)
+
+    def render_item(self, **kwargs):
+        """Returns XML element of the item."""
+        self.add_item(**kwargs)
+        try:
+            return self.render(self.write_items)
+        finally:
+            self.items.clear()
+
+
+class RssFeed(StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+class AtomFeed(StreamingFeedMixin, feedgenerator.Atom1Feed):
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        handler.endElement('feed')
+
+
+FEED_TYPES = {
+    'rss': RssFeed,
+    'atom': AtomFeed,
+}
+
+
+def get_feed_type(feed_format):
+    if feed_format not in FEED_TYPES:
+        raise Http404('Неизвестный формат ленты')
+    return FEED_TYPES[feed_format]
+
+
+def item_key(feed_format, host, post, versions):
+    return f'feed_item:{feed_format}:{host}:{cards.card_key(post, versions)}'
+
+
+def get_item(request, post):
+    link = request.build_absolute_uri(
+        reverse('posts:post_detail', args=(post.pk,))
+    )
+    return {
+        'title': Truncator(post.text).words(TITLE_WORDS),
+        'link': link,
+        'description': post.text,
+        'unique_id': link,
+        'pubdate': post.pub_date,
+        'updateddate': post.updated_at,
+        'author_name': post.author.get_full_name() or post.author.username,
+        'categories': [post.group.title] if post.group else None,
+    }
+
+
+def render_items(feed, feed_format, request, posts):
+    """
+    Returns XML of the items of the posts.
+    Uses two cache round trips for any number of posts.
+    """
+    if not posts:
+        return []
+    host = request.get_host()
+    versions = get_stamps(list({
+        key for post in posts for key in cards.get_dependencies(post)
+    }))
+    keys = [item_key(feed_format, host, post, versions) for post in posts]
+    items = cache.get_many(keys)
+    rendered = {}
+    for key, post in zip(keys, posts):
+        if key not in items:
+            rendered[key] = feed.render_item(**get_item(request, post))
+    if rendered:
+        cache.set_many(rendered, cards.get_card_timeout())
+        items.update(rendered)
+    return [items[key] for key in keys]
+
+
+def stream_feed(chunks, key):
+    """Yields the chunks and caches the document after the last one."""
+    document = []
+    for chunk in chunks:
+        document.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(document), get_listing_timeout())
+
+
+def generate_feed(feed, feed_format, request, posts_list):
+    yield feed.render_head()
+    posts = list(posts_list[:get_feed_size()])
+    yield from render_items(feed, feed_format, request, posts)
+    yield feed.render_tail()
+
+
+def feed_response(request, feed_format, listing, posts_list, title, link,
+                  description):
+    """Returns cached or streamed feed of the latest posts."""
+    feed_type = get_feed_type(feed_format)
+    key = generation_key(listing)
+    stamp = get_stamps([key])[key]
+    document_key = (
+        f'feed:{feed_format}:{request.get_host()}:{listing}:{stamp}'
+    )
+    document = cache.get(document_key)
+    if document is not None:
+        return HttpResponse(document, content_type=feed_type.content_type)
+    feed = feed_type(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description,
+        feed_url=request.build_absolute_uri(request.path),
+        language='ru',
+        updated=posts_list.aggregate(latest=Max('updated_at'))['latest'],
+    )
+    return StreamingHttpResponse(
+        stream_feed(
+            generate_feed(feed, feed_format, request, posts_list),
+            document_key
+        ),
+        content_type=feed_type.content_type
+    )
+
+
+def index_freshness(request, feed_format):
+    return listing_freshness(
+        [INDEX], Post.objects.all(), 'feed', request.build_absolute_uri()
+    )
+
+
+def group_freshness(request, feed_format, slug):
+    return listing_freshness(
+        [group_listing(slug)],
+        Post.objects.filter(group__slug=slug),
+        'feed', request.build_absolute_uri()
+    )
+
+
+def profile_freshness(request, feed_format, username):
+    return listing_freshness(
+        [profile_listing(username)],
+        Post.objects.filter(author__username=username),
+        'feed', request.build_absolute_uri()
+    )
+
+
+@conditional(index_freshness)
+def index(request, feed_format):
+    """Returns feed of the latest posts"""
+    return feed_response(
+        request, feed_format, INDEX,
+        Post.objects.select_related('group', 'author'),
+        title='Yatube',
+        link=reverse('posts:index'),
+        description='Последние обновления на сайте',
+    )
+
+
+@conditional(group_freshness)
+def group_posts(request, feed_format, slug):
+    """Returns feed of the latest group posts"""
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request, feed_format, group_listing(slug),
+        group.posts.select_related('group', 'author'),
+        title=f'Yatube: {group.title}',
+        link=reverse('posts:group_list', args=(slug,)),
+        description=group.description,
+    )
+
+
+@conditional(profile_freshness)
+def profile(request, feed_format, username):
+    """Returns feed of the latest author posts"""
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, feed_format, profile_listing(username),
+        author.posts.select_related('group', 'author'),
+        title=f'Yatube: {author.get_full_name() or author.username}',
+        link=reverse('posts:profile', args=(username,)),
+        description=f'Записи пользователя {author.username}',
+    )
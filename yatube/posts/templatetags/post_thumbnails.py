@@ -0,0 +1,32 @@
+from django import template
+
+from posts.thumbnails import get_post_thumbnail, get_ready_thumbnail
+from posts.variants import get_picture
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, geometry_string, **options):
+    """
+    Returns pre-generated thumbnail or None if it is not ready yet
+    """
+    return get_ready_thumbnail(image, geometry_string, **options)
+
+
+@register.simple_tag
+def post_thumbnail(image):
+    """
+    Returns pre-generated thumbnail of the card size from
+    POST_THUMBNAIL_SIZES or None if it is not ready yet
+    """
+    return get_post_thumbnail(image)
+
+
+@register.simple_tag
+def image_picture(post):
+    """
+    Returns data of <picture> tag with responsive variants
+    of the post image or None if they are not ready yet
+    """
+    return get_picture(post)
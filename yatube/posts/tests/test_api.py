@@ -0,0 +1,153 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class JsonApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=self.author,
+                group=self.group,
+            )
+            for number in range(3)
+        ]
+        self.client = Client()
+
+    def test_listing_fields_and_cursor(self):
+        """Testing listing returns post fields and cursor links"""
+        url = reverse('posts:api_index')
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'limit': 2})
+        data = response.json()
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [self.posts[2].pk, self.posts[1].pk]
+        )
+        self.assertEqual(data['results'][0], {
+            'id': self.posts[2].pk,
+            'text': 'Пост 2',
+            'pub_date': DjangoJSONEncoder().default(self.posts[2].pub_date),
+            'author': 'author',
+            'group': 'test-slug',
+            'image': None,
+            'comments_count': 0,
+        })
+        self.assertIsNone(data['previous'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], [self.posts[0].pk]
+        )
+        self.assertIsNone(data['next'])
+
+    def test_listings_of_group_and_profile(self):
+        """Testing group and profile listings"""
+        for url in (
+            reverse('posts:api_group', args=('test-slug',)),
+            reverse('posts:api_profile', args=('author',)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    len(self.client.get(url).json()['results']), 3
+                )
+        for url in (
+            reverse('posts:api_group', args=('missing',)),
+            reverse('posts:api_profile', args=('missing',)),
+            reverse('posts:api_post', args=(0,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url).status_code, HTTPStatus.NOT_FOUND
+                )
+
+    def test_conditional_listing(self):
+        """Testing listing answers 304 until posts are changed"""
+        url = reverse('posts:api_index')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED
+        )
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code,
+            HTTPStatus.NOT_MODIFIED
+        )
+        self.posts[0].text = 'Измененный пост'
+        self.posts[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_conditional_post_detail(self):
+        """Testing post with comments answers 304 until comment is added"""
+        url = reverse('posts:api_post', args=(self.posts[0].pk,))
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.json()['comments'][0]['text'], 'Комментарий'
+        )
+
+    @override_settings(COMMENTS_PAGE_SIZE=2)
+    def test_post_detail_comments_page(self):
+        """Testing post embeds first comments page and links the next"""
+        for number in range(3):
+            Comment.objects.create(
+                post=self.posts[0], author=self.reader, text=f'Текст {number}'
+            )
+        data = self.client.get(
+            reverse('posts:api_post', args=(self.posts[0].pk,))
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['Текст 2', 'Текст 1']
+        )
+        data = self.client.get(data['comments_next']).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['results']], ['Текст 0']
+        )
+        self.assertIsNone(data['next'])
+
+    def test_follow_feed(self):
+        """Testing follow feed needs login and shows followed authors"""
+        url = reverse('posts:api_follow')
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.UNAUTHORIZED
+        )
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(url).json()['results'], [])
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertIn('Cookie', response['Vary'])
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, Timeline, UserStats
+from ..search import search_posts
+
+User = get_user_model()
+
+
+class ArchiveCommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.posts = [
+            Post.objects.create(
+                text=f'Кошка номер {number}, "с кавычками"\nи строкой',
+                author=self.author,
+                group=self.group if number else None,
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write(self, name, content):
+        with open(self.path(name), 'w', encoding='utf-8') as file:
+            file.write(content)
+        return self.path(name)
+
+    def test_export_and_import_back(self):
+        """Testing exported archive is imported with ids and dates"""
+        files = {
+            'posts': self.path('posts.jsonl'),
+            'comments': self.path('comments.csv'),
+            'follows': self.path('follows.jsonl'),
+        }
+        out = StringIO()
+        for kind, path in files.items():
+            call_command(
+                'export_posts', kind=kind, output=path, chunk_size=2,
+                stdout=out
+            )
+        self.assertIn('Exported 3 posts', out.getvalue())
+        expected = list(Post.objects.values_list(
+            'pk', 'text', 'pub_date', 'author', 'group'
+        ))
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        out = StringIO()
+        for kind, path in files.items():
+            call_command(
+                'import_posts', path, kind=kind, batch_size=2, stdout=out
+            )
+        self.assertIn('Imported 3 posts', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(list(Post.objects.values_list(
+            'pk', 'text', 'pub_date', 'author', 'group'
+        )), expected)
+        post = Post.objects.get(pk=self.posts[0].pk)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.comments.get().author, self.reader)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 1
+        )
+        self.assertEqual(Timeline.objects.filter(user=self.reader).count(), 3)
+        self.assertEqual(search_posts('кошки').count(), 3)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertGreater(new_post.pk, self.posts[2].pk)
+
+    def test_standard_streams(self):
+        """Testing export to stdout is imported back from stdin"""
+        out, err = StringIO(), StringIO()
+        call_command('export_posts', stdout=out, stderr=err)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        self.assertIn('Exported 3 posts', err.getvalue())
+        Post.objects.all().delete()
+        out.seek(0)
+        call_command(
+            'import_posts', stdin=out, no_refresh=True, stdout=StringIO()
+        )
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            sorted(post.text for post in self.posts)
+        )
+
+    def test_files_are_utf8(self):
+        """Testing archive files are UTF-8 whatever the locale"""
+        path = self.path('posts.jsonl')
+        call_command('export_posts', output=path, stdout=StringIO())
+        with open(path, encoding='utf-8') as file:
+            self.assertIn('Кошка номер 0', file.read())
+
+    def test_malformed_record(self):
+        """Testing unreadable line fails with its record number"""
+        path = self.write(
+            'posts.jsonl',
+            '{"text": "Пост", "author": "author"}\n{"text": "обрыв\n'
+        )
+        with self.assertRaisesMessage(CommandError, 'Record 2: unreadable'):
+            call_command('import_posts', path, stdout=StringIO())
+
+    def test_unknown_references(self):
+        """Testing unknown authors fail or are created on request"""
+        path = self.write(
+            'posts.csv',
+            'text,author,group\nПост,stranger,new-group\n'
+        )
+        with self.assertRaisesMessage(
+            CommandError, "Record 1: Unknown user 'stranger'"
+        ):
+            call_command('import_posts', path, stdout=StringIO())
+        out = StringIO()
+        call_command('import_posts', path, create_missing=True, stdout=out)
+        self.assertIn('created 1 users and 1 groups', out.getvalue())
+        post = Post.objects.get(author__username='stranger')
+        self.assertEqual(post.group.slug, 'new-group')
+        self.assertFalse(post.author.has_usable_password())
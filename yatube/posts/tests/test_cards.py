@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cards import render_cards
+from ..listings import (INDEX, generation_key, group_listing,
+                        profile_listing)
+from ..models import Comment, Group, Post
+from ..stamps import get_stamps
+
+User = get_user_model()
+
+
+class PostCardsCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.user,
+            group=self.group,
+        )
+
+    def get_posts(self):
+        return list(Post.objects.all())
+
+    def test_cached_cards_need_no_queries(self):
+        """Testing cached cards don't load author and group"""
+        first = render_cards(self.get_posts())
+        posts = self.get_posts()
+        with CaptureQueriesContext(connection) as context:
+            second = render_cards(posts)
+        self.assertEqual(first, second)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_post_edit_invalidates_card(self):
+        """Testing edited post card is rendered again"""
+        render_cards(self.get_posts())
+        self.post.text = 'Измененный текст'
+        self.post.save()
+        self.assertIn('Измененный текст', render_cards(self.get_posts())[0])
+
+    def test_author_and_group_change_invalidates_card(self):
+        """Testing author and group changes are shown in cards"""
+        render_cards(self.get_posts())
+        self.user.first_name = 'Новое'
+        self.user.last_name = 'Имя'
+        self.user.save()
+        self.assertIn('Новое Имя', render_cards(self.get_posts())[0])
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.assertIn('/group/new-slug/', render_cards(self.get_posts())[0])
+
+    def test_comment_invalidates_card(self):
+        """Testing new comment changes comments counter in card"""
+        self.assertIn('Комментариев: 0', render_cards(self.get_posts())[0])
+        Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text='Комментарий',
+        )
+        self.assertIn('Комментариев: 1', render_cards(self.get_posts())[0])
+
+    def test_comment_keeps_index_generation(self):
+        """Testing comment bumps only listings of its author and group"""
+        # Slug may be left changed in memory by another test
+        self.group.refresh_from_db()
+        keys = [generation_key(listing) for listing in (
+            INDEX, group_listing(self.group.slug),
+            profile_listing(self.user.username),
+        )]
+        before = get_stamps(keys)
+        Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text='Комментарий',
+        )
+        after = get_stamps(keys)
+        self.assertEqual(after[keys[0]], before[keys[0]])
+        self.assertNotEqual(after[keys[1]], before[keys[1]])
+        self.assertNotEqual(after[keys[2]], before[keys[2]])
+
+    def test_index_shows_no_comments_counter(self):
+        """Testing cached index has no counter to go stale on comments"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Комментариев:')
+        self.assertIn('Комментариев: 0', render_cards(self.get_posts())[0])
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..comments import render_first_page
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PAGE_SIZE=2)
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Комментарий {number}'
+            )
+        cls.url = reverse('posts:comments', args=(cls.post.pk,))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_page_shows_first_page(self):
+        """Testing post page shows the latest comments and a link to more"""
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertContains(response, 'Комментарий 4')
+        self.assertContains(response, 'Комментарий 3')
+        self.assertNotContains(response, 'Комментарий 2')
+        self.assertContains(response, f'{self.url}?after=')
+
+    def test_fragments_follow_cursor(self):
+        """Testing html fragments load the next pages until the end"""
+        texts = []
+        url = self.url
+        while url:
+            response = Client().get(url)
+            page = response.context['comments']
+            texts.extend(comment.text for comment in page)
+            url = page.has_next() and f'{self.url}?after={page.next_cursor}'
+        self.assertEqual(
+            texts, [f'Комментарий {number}' for number in range(4, -1, -1)]
+        )
+        self.assertNotContains(response, 'data-more-comments')
+
+    def test_json_pages(self):
+        """Testing JSON pages of comments with next link"""
+        data = Client().get(self.url, {'format': 'json'}).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['results']],
+            ['Комментарий 4', 'Комментарий 3'],
+        )
+        self.assertEqual(data['results'][0]['author'], 'author')
+        data = Client().get(data['next']).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['results']],
+            ['Комментарий 2', 'Комментарий 1'],
+        )
+        self.assertIn('format=json', data['next'])
+
+    def test_missing_post(self):
+        """Testing comments of a missing post answer 404"""
+        url = reverse('posts:comments', args=(self.post.pk + 1,))
+        self.assertEqual(Client().get(url).status_code, HTTPStatus.NOT_FOUND)
+        response = Client().get(url, {'format': 'json'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response.json(), {'detail': 'Пост не найден'})
+
+    def test_first_page_cached_under_comments_version(self):
+        """Testing first page is cached until a comment changes"""
+        render_first_page(self.post.pk)
+        with self.assertNumQueries(0):
+            render_first_page(self.post.pk)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Свежий комментарий'
+        )
+        self.assertIn('Свежий комментарий', render_first_page(self.post.pk))
@@ -0,0 +1,109 @@
+import time
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group,
+        )
+        self.client = Client()
+        self.urls = (
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+
+    def get_etags(self):
+        return [self.client.get(url)['ETag'] for url in self.urls]
+
+    def assert_not_modified(self, etags):
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                    HTTPStatus.NOT_MODIFIED
+                )
+
+    def assert_modified(self, etags):
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_not_modified(self):
+        """Testing pages answer 304 by ETag and Last-Modified"""
+        self.assert_not_modified(self.get_etags())
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('Cookie', response['Vary'])
+                with self.assertNumQueries(1):
+                    status_code = self.client.get(
+                        url,
+                        HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                    ).status_code
+                self.assertEqual(status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_changes_etag(self):
+        """Testing edited post makes pages modified"""
+        etags = self.get_etags()
+        self.post.text = 'Измененный пост'
+        self.post.save()
+        self.assert_modified(etags)
+
+    def test_comment_changes_etag(self):
+        """Testing comment touches the post and makes pages modified"""
+        etags = self.get_etags()
+        updated_at = self.post.updated_at
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, updated_at)
+        self.assert_modified(etags)
+
+    def test_login_changes_etag(self):
+        """Testing pages of another user are not answered with 304"""
+        etags = self.get_etags()
+        self.client.force_login(self.reader)
+        self.assert_modified(etags)
+
+    def test_delete_changes_last_modified(self):
+        """Testing deleted post makes listings modified by date"""
+        listings = self.urls[1:]
+        newest = Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group,
+        )
+        dates = [self.client.get(url)['Last-Modified'] for url in listings]
+        time.sleep(1)
+        newest.delete()
+        for url, date in zip(listings, dates):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=date)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotIn(newest, response.context['page_obj'])
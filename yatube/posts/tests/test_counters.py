@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..counters import recount_users
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+
+    def get_stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Testing posts counters of author and groups"""
+        post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group,
+        )
+        self.assertEqual(self.get_stats(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.get_stats(self.author).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_counter(self):
+        """Testing comments counter of the post"""
+        post = Post.objects.create(text='Тестовый пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post,
+            author=self.follower,
+            text='Комментарий',
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Testing followers and following counters"""
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.get_stats(self.author).followers_count, 1)
+        self.assertEqual(self.get_stats(self.follower).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.get_stats(self.author).followers_count, 0)
+        self.assertEqual(self.get_stats(self.follower).following_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        """Testing recount restores counters from source tables"""
+        post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.author,
+            group=self.group,
+        )
+        Comment.objects.create(
+            post=post,
+            author=self.follower,
+            text='Комментарий',
+        )
+        Follow.objects.create(user=self.follower, author=self.author)
+        UserStats.objects.update(
+            posts_count=10, followers_count=10, following_count=10
+        )
+        Group.objects.update(posts_count=10)
+        Post.objects.update(comments_count=10)
+        call_command('recount', stdout=StringIO())
+        author_stats = self.get_stats(self.author)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(self.get_stats(self.follower).following_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_recount_creates_missing_stats(self):
+        """Testing recount fills lost stats rows in fixed queries"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        UserStats.objects.all().delete()
+        with self.assertNumQueries(3):
+            self.assertEqual(recount_users(), 2)
+        self.assertEqual(self.get_stats(self.author).followers_count, 1)
+        self.assertEqual(self.get_stats(self.follower).following_count, 1)
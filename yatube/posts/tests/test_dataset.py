@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+
+from ..models import Comment, Follow, Post, Timeline, User, UserStats
+from ..search import search_posts
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class GenerateDatasetTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_generate_dataset(self):
+        """Testing dataset is generated with consistent derived data"""
+        out = StringIO()
+        call_command(
+            'generate_dataset', users=20, groups=3, posts=200, follows=3,
+            comments=100, image_share=0.5, stdout=out
+        )
+        self.assertIn('Created 20 users, 3 groups, 200 posts', out.getvalue())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        authors = list(Post.objects.values('author').annotate(
+            number=Count('pk')
+        ).order_by('-number').values_list('author__username', flat=True))
+        self.assertEqual(authors[0], 'user0')
+        self.assertEqual(
+            UserStats.objects.aggregate(total=Sum('posts_count'))['total'],
+            200
+        )
+        self.assertEqual(
+            Post.objects.aggregate(total=Sum('comments_count'))['total'],
+            100
+        )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            Timeline.objects.filter(
+                user=follow.user, author=follow.author
+            ).count(),
+            Post.objects.filter(author=follow.author).count()
+        )
+        self.assertTrue(search_posts(Post.objects.first().text).exists())
+        self.assertEqual(
+            len(set(Post.objects.values_list('pub_date', flat=True))), 200
+        )
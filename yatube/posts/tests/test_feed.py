@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, Timeline
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+        )
+        cls.FOLLOW_INDEX_REV = reverse('posts:follow_index')
+
+    def setUp(self):
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def get_feed_posts(self):
+        response = self.follower_client.get(self.FOLLOW_INDEX_REV)
+        return list(response.context['page_obj'].object_list)
+
+    def test_follow_backfills_and_unfollow_trims_timeline(self):
+        """Testing follow copies posts and unfollow removes them"""
+        self.follower_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertTrue(Timeline.objects.filter(
+            user=self.follower, post=self.post
+        ).exists())
+        self.assertEqual(self.get_feed_posts(), [self.post])
+        self.follower_client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertFalse(Timeline.objects.filter(
+            user=self.follower
+        ).exists())
+        self.assertEqual(self.get_feed_posts(), [])
+
+    def test_new_post_fanned_out_to_followers(self):
+        """Testing new post is written into followers timelines"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(
+            text='Новый пост',
+            author=self.author,
+        )
+        self.assertTrue(Timeline.objects.filter(
+            user=self.follower, post=new_post
+        ).exists())
+        self.assertEqual(self.get_feed_posts(), [new_post, self.post])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_posts_pulled_on_read(self):
+        """Testing posts of authors over the limit are read on request"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(
+            text='Новый пост',
+            author=self.author,
+        )
+        self.assertFalse(Timeline.objects.filter(
+            user=self.follower
+        ).exists())
+        self.assertEqual(self.get_feed_posts(), [new_post, self.post])
+
+    def test_rebuild_timelines_command(self):
+        """Testing rebuild_timelines restores timeline rows"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Timeline.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_timelines', stdout=out)
+        self.assertIn('Created 1 timeline rows', out.getvalue())
+        self.assertEqual(self.get_feed_posts(), [self.post])
@@ -1,12 +1,15 @@
+import os
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Comment, Group, Post
 from .utils import check_is_exist_form_comment, check_is_exist_form_post
@@ -16,7 +19,7 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -137,6 +140,79 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageUploadFormTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post_author = Client()
+        self.post_author.force_login(self.user)
+
+    def get_image(self, size, image_format='JPEG'):
+        image = Image.new('RGB', size, 'blue')
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        image.save(buffer, image_format, exif=exif)
+        extension = image_format.lower()
+        return SimpleUploadedFile(
+            name=f'photo.{extension}',
+            content=buffer.getvalue(),
+            content_type=f'image/{extension}'
+        )
+
+    def create_post(self, image, client=None):
+        return (client or self.post_author).post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с фото', 'image': image},
+        )
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_too_large_upload_rejected(self):
+        """Testing upload above the size limit is rejected."""
+        posts_count = Post.objects.count()
+        response = self.create_post(SimpleUploadedFile(
+            name='big.jpg',
+            content=os.urandom(4096),
+            content_type='image/jpeg'
+        ))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFormError(
+            response, 'form', 'image',
+            'Размер файла не должен превышать 1,0\xa0КБ.'
+        )
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    @override_settings(POST_IMAGE_MAX_SIDE=400)
+    def test_image_reduced_without_metadata(self):
+        """Testing large image is reduced and saved without EXIF."""
+        for image_format in ('JPEG', 'PNG'):
+            with self.subTest(image_format=image_format):
+                self.create_post(self.get_image((1200, 600), image_format))
+                post = Post.objects.filter(author=self.user).latest('pk')
+                with Image.open(post.image.path) as image:
+                    self.assertEqual(image.size, (400, 200))
+                    self.assertEqual(image.format, image_format)
+                    self.assertNotIn('exif', image.info)
+                    self.assertFalse(image.getexif())
+
+    def test_upload_checks_csrf(self):
+        """Testing upload views still check CSRF token."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = self.create_post(self.get_image((10, 10)), client)
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+
+
 class CommentCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -179,5 +255,6 @@ class CommentCreateFormTests(TestCase):
             args=(self.post.id,)
         ))
         self.assertEqual(self.post.comments.count(), comment_count + 1)
-        first_object = response.context['comments'][0]
+        first_object = self.post.comments.select_related('author').first()
         check_is_exist_form_comment(self, first_object, form_data)
+        self.assertContains(response, form_data['text'])
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from .. import ingest
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentIngestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        cls.url = reverse('posts:add_comment', args=(cls.post.pk,))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_unknown_post(self):
+        """Testing comment to a missing post answers 404"""
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk + 1,)),
+            {'text': 'Комментарий'}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.exists())
+
+    @override_settings(COMMENT_RATE_LIMIT=(2, 60))
+    def test_rate_limit(self):
+        """Testing comments above the user limit answer 429"""
+        for number in range(2):
+            response = self.client.post(self.url, {'text': f'Текст {number}'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(self.url, {'text': 'Лишний'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        response = other.post(self.url, {'text': 'Другой автор'})
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(COMMENT_BUFFER_INTERVAL=60)
+    def test_buffered_comments(self):
+        """Testing buffered comments are saved with counters on flush"""
+        detail_url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.client.get(detail_url)
+        for number in range(3):
+            self.client.post(self.url, {'text': f'Буфер {number}'})
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ingest.buffer.flush(), 3)
+        self.assertEqual(Comment.objects.count(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 3)
+        self.assertContains(self.client.get(detail_url), 'Буфер 2')
+        self.assertEqual(ingest.buffer.flush(), 0)
+
+
+@override_settings(COMMENT_BUFFER_INTERVAL=60)
+class CommentBufferFailuresTests(TransactionTestCase):
+    """Foreign keys of sqlite are checked on commit."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def queue(self, post, author, text):
+        ingest.buffer.add(Comment(post=post, author=author, text=text))
+
+    def test_comments_to_deleted_posts_dropped(self):
+        """Testing comments to deleted posts do not block the buffer"""
+        deleted = Post.objects.create(text='Удаленный', author=self.author)
+        self.queue(deleted, self.author, 'Сирота')
+        self.queue(self.post, self.author, 'Живой')
+        deleted.delete()
+        with self.assertLogs('posts.ingest', 'WARNING'):
+            self.assertEqual(ingest.buffer.flush(), 1)
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Живой']
+        )
+        self.assertEqual(ingest.buffer.flush(), 0)
+
+    def test_bad_comment_saved_apart(self):
+        """Testing a failing comment is dropped and the others are saved"""
+        stranger = User.objects.create_user(username='stranger')
+        self.queue(self.post, stranger, 'Без автора')
+        self.queue(self.post, self.author, 'Первый')
+        self.queue(self.post, self.author, 'Второй')
+        stranger.delete()
+        with self.assertLogs('posts.ingest', 'ERROR'):
+            self.assertEqual(ingest.buffer.flush(), 2)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+        self.assertEqual(ingest.buffer.flush(), 0)
@@ -0,0 +1,180 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from about import urls as about_urls
+from users import urls as users_urls
+
+from .. import urls as posts_urls
+from ..models import Comment, Follow, Group, Post
+from ..utils import UNITS_ON_PAGE
+
+User = get_user_model()
+
+# Upper bounds of queries of every page, the same for any number of posts.
+# Pages of a logged in user include session and user queries,
+# trending pages include the ranking rebuilt after cache.clear().
+QUERY_BOUNDS = {
+    'posts:index': 4,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 5,
+    'posts:comments': 3,
+    'posts:add_comment': 3,
+    'posts:post_create': 3,
+    'posts:post_edit': 5,
+    'posts:follow_index': 7,
+    'posts:search': 3,
+    'posts:trending': 5,
+    'posts:trending_group': 6,
+    'posts:api_index': 2,
+    'posts:api_post': 3,
+    'posts:api_group': 3,
+    'posts:api_profile': 3,
+    'posts:api_follow': 5,
+    'posts:feed_index': 2,
+    'posts:feed_group': 3,
+    'posts:feed_profile': 3,
+    'posts:profile_follow': 16,
+    'posts:profile_unfollow': 4,
+    'users:logout': 4,
+    'users:login': 2,
+    'users:password_change': 2,
+    'users:password_change_done': 2,
+    'users:password_reset': 2,
+    'users:password_reset_done': 2,
+    'users:password_reset_confirm': 3,
+    'users:password_reset_complete': 2,
+    'users:signup': 2,
+    'about:author': 2,
+    'about:tech': 2,
+}
+
+
+class QueryCountTests(TestCase):
+    """
+    Counts queries of every page with one post and with several pages
+    of posts by different authors in different groups with comments.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост автора',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.pages = {
+            'posts:index': (),
+            'posts:group_list': (cls.group.slug,),
+            'posts:profile': (cls.author.username,),
+            'posts:post_detail': (cls.post.pk,),
+            'posts:comments': (cls.post.pk,),
+            'posts:add_comment': (cls.post.pk,),
+            'posts:post_create': (),
+            'posts:post_edit': (cls.post.pk,),
+            'posts:follow_index': (),
+            'posts:search': (),
+            'posts:trending': (),
+            'posts:trending_group': (cls.group.slug,),
+            'posts:api_index': (),
+            'posts:api_post': (cls.post.pk,),
+            'posts:api_group': (cls.group.slug,),
+            'posts:api_profile': (cls.author.username,),
+            'posts:api_follow': (),
+            'posts:feed_index': ('rss',),
+            'posts:feed_group': ('atom', cls.group.slug),
+            'posts:feed_profile': ('rss', cls.author.username),
+            'posts:profile_follow': (cls.other.username,),
+            'posts:profile_unfollow': (cls.other.username,),
+            'users:logout': (),
+            'users:login': (),
+            'users:password_change': (),
+            'users:password_change_done': (),
+            'users:password_reset': (),
+            'users:password_reset_done': (),
+            'users:password_reset_confirm': ('MQ', 'invalid-token'),
+            'users:password_reset_complete': (),
+            'users:signup': (),
+            'about:author': (),
+            'about:tech': (),
+        }
+        cls.params = {'posts:search': {'q': 'пост'}}
+
+    @classmethod
+    def add_posts(cls, count):
+        """Adds posts of new followed authors in new groups."""
+        start = Post.objects.count()
+        for number in range(start, start + count):
+            author = User.objects.create_user(
+                username=f'author{number}', first_name=f'Автор {number}'
+            )
+            group = Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group-{number}',
+                description='Описание',
+            )
+            Follow.objects.create(user=cls.author, author=author)
+            for post in (
+                Post.objects.create(
+                    text=f'Пост номер {number}', author=author, group=group
+                ),
+                Post.objects.create(
+                    text=f'Пост группы {number}',
+                    author=cls.author,
+                    group=group,
+                ),
+            ):
+                Comment.objects.create(
+                    post=post, author=author, text='Комментарий'
+                )
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий'
+            )
+
+    def count_queries(self, name):
+        """Returns number of queries of the page, changes are rolled back."""
+        url = reverse(name, args=self.pages[name])
+        client = Client()
+        client.force_login(self.author)
+        cache.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as context:
+                client.get(url, self.params.get(name))
+            transaction.set_rollback(True)
+        return len(context)
+
+    def count_all(self):
+        return {name: self.count_queries(name) for name in QUERY_BOUNDS}
+
+    def test_every_page_has_bound(self):
+        """Testing every URL of posts, users and about is covered"""
+        names = {
+            f'{module.app_name}:{pattern.name}'
+            for module in (posts_urls, users_urls, about_urls)
+            for pattern in module.urlpatterns
+        }
+        self.assertEqual(set(QUERY_BOUNDS), names)
+        self.assertEqual(set(self.pages), names)
+
+    def test_queries_do_not_grow_with_page_size(self):
+        """Testing pages run the same bounded number of queries"""
+        self.add_posts(1)
+        small = self.count_all()
+        self.add_posts(UNITS_ON_PAGE * 2)
+        large = self.count_all()
+        for name, bound in QUERY_BOUNDS.items():
+            with self.subTest(name=name):
+                self.assertEqual(large[name], small[name])
+                self.assertLessEqual(large[name], bound)
@@ -0,0 +1,132 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..suggestions import suggest
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        for i in range(15):
+            Post.objects.create(
+                text=f'Тестовый пост {i}',
+                author=cls.author,
+                group=cls.group,
+            )
+        cls.post = Post.objects.first()
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.follower,
+                text=f'Комментарий {i}',
+            )
+        cls.urls_main_table = {
+            reverse('posts:index'): 'posts_post',
+            reverse('posts:group_list', args=(cls.group.slug,)): 'posts_post',
+            reverse('posts:profile', args=(cls.author.username,)):
+                'posts_post',
+            reverse('posts:follow_index'): 'posts_post',
+            reverse('posts:post_detail', args=(cls.post.id,)):
+                'posts_comment',
+        }
+        # Pages paginated by cursor: url -> (table, context name of page)
+        cls.cursor_pages = {
+            reverse('posts:index'): ('posts_post', 'page_obj'),
+            reverse('posts:group_list', args=(cls.group.slug,)):
+                ('posts_post', 'page_obj'),
+            reverse('posts:profile', args=(cls.author.username,)):
+                ('posts_post', 'page_obj'),
+            reverse('posts:follow_index'): ('posts_post', 'page_obj'),
+            reverse('posts:comments', args=(cls.post.id,)):
+                ('posts_comment', 'comments'),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def get_main_query(self, url, table):
+        """Returns sorted query of the page selecting from the table."""
+        with CaptureQueriesContext(connection) as context:
+            self.follower_client.get(url)
+        for query in context.captured_queries:
+            sql = query['sql']
+            if f'FROM "{table}"' in sql and 'ORDER BY' in sql:
+                return sql
+        self.fail(f'No sorted query from {table} on {url}')
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def test_main_queries_use_index_without_sort(self):
+        """Testing main page queries use index and no temp b-tree sort"""
+        for url, table in self.urls_main_table.items():
+            with self.subTest(url=url):
+                plan = self.explain(self.get_main_query(url, table))
+                self.assertIn('INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    @override_settings(PAGINATION_MODE='cursor', COMMENTS_PAGE_SIZE=2)
+    def test_cursor_queries_use_index_without_sort(self):
+        """Testing cursor pages use index and no temp b-tree sort"""
+        for url, (table, name) in self.cursor_pages.items():
+            with self.subTest(url=url):
+                first_page = self.follower_client.get(url).context.get(name)
+                self.assertIsNotNone(first_page, f'No {name} on {url}')
+                self.assertTrue(first_page.has_next())
+                sql = self.get_main_query(
+                    url + f'?after={first_page.next_cursor}', table
+                )
+                plan = self.explain(sql)
+                self.assertIn('INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_twice_keeps_one_row(self):
+        """Testing unique follow constraint keeps one follow row"""
+        follow_url = reverse('posts:profile_follow', args=('author',))
+        self.follower_client.get(follow_url)
+        self.follower_client.get(follow_url)
+        self.assertEqual(
+            Follow.objects.filter(
+                user=self.follower, author=self.author
+            ).count(),
+            1
+        )
+
+    def test_suggestions_sample_followers_by_index(self):
+        """Testing suggestions sample followers without sorting them"""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.follower, author=other)
+        for i in range(3):
+            user = User.objects.create_user(username=f'reader{i}')
+            Follow.objects.create(user=user, author=self.author)
+            Follow.objects.create(user=user, author=other)
+        with CaptureQueriesContext(connection) as context:
+            suggest(self.follower.pk)
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'UNION ALL' in query['sql']
+        )
+        plan = self.explain(sql)
+        self.assertNotIn('CORRELATED', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertIn('follow_author_user_idx', plan)
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import ranking
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.fresh = self.create_post('Свежий пост', hours=1)
+        self.popular = self.create_post('Популярный пост', hours=24)
+        self.stale = self.create_post('Старый пост', hours=24 * 10)
+        self.grouped = self.create_post(
+            'Пост группы', hours=2, group=self.group
+        )
+        self.comment(self.popular, 10)
+        self.comment(self.stale, 100)
+
+    def create_post(self, text, hours, group=None, author=None):
+        post = Post.objects.create(
+            text=text, author=author or self.author, group=group
+        )
+        posts = Post.objects.filter(pk=post.pk)
+        posts.update(pub_date=timezone.now() - timedelta(hours=hours))
+        # update() sends no signals
+        ranking.update_posts(posts)
+        return post
+
+    def comment(self, post, number):
+        for _ in range(number):
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий'
+            )
+
+    def test_rebuild_ranks_by_decayed_popularity(self):
+        """Testing rebuild ranks recent posts by comments and age"""
+        out, err = StringIO(), StringIO()
+        call_command('update_trending', stdout=out, stderr=err)
+        self.assertIn('Ranked 3 recent posts', out.getvalue())
+        self.assertIn('The cache is local to this process', err.getvalue())
+        self.assertEqual(
+            ranking.get_trending(),
+            [self.popular, self.fresh, self.grouped]
+        )
+        self.assertEqual(ranking.get_trending(self.group.slug), [self.grouped])
+
+    def test_writes_update_cached_lists(self):
+        """Testing comments and follows move posts without rebuild"""
+        ranking.rebuild()
+        self.comment(self.grouped, 20)
+        self.assertEqual(ranking.get_trending()[0], self.grouped)
+        other = self.create_post(
+            'Пост другого автора', hours=3, author=self.reader
+        )
+        trending = ranking.get_trending()
+        self.assertGreater(trending.index(other), trending.index(self.fresh))
+        Follow.objects.create(user=self.author, author=self.reader)
+        trending = ranking.get_trending()
+        self.assertLess(trending.index(other), trending.index(self.fresh))
+
+    def test_moved_post_leaves_old_group(self):
+        """Testing post moved to another group leaves its former list"""
+        other_group = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Описание'
+        )
+        ranking.rebuild()
+        self.grouped.group = other_group
+        self.grouped.save()
+        self.assertEqual(ranking.get_trending(self.group.slug), [])
+        self.assertEqual(
+            ranking.get_trending(other_group.slug), [self.grouped]
+        )
+
+    def test_concurrent_miss_does_not_rebuild(self):
+        """Testing a miss during another rebuild does not rank again"""
+        cache.add(ranking.REBUILD_LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(ranking.get_trending(), [])
+        cache.delete(ranking.REBUILD_LOCK_KEY)
+        self.assertEqual(ranking.get_trending()[0], self.popular)
+        self.assertIsNone(cache.get(ranking.REBUILD_LOCK_KEY))
+
+    def test_trending_pages(self):
+        """Testing trending pages show ranked posts from cache"""
+        ranking.rebuild()
+        response = Client().get(reverse('posts:trending'))
+        content = response.content.decode()
+        self.assertLess(
+            content.index('Популярный пост'), content.index('Свежий пост')
+        )
+        self.assertNotIn('Старый пост', content)
+        response = Client().get(
+            reverse('posts:trending_group', args=(self.group.slug,))
+        )
+        self.assertContains(response, 'Пост группы')
+        self.assertNotContains(response, 'Популярный пост')
+        response = Client().get(
+            reverse('posts:trending_group', args=('missing',))
+        )
+        self.assertEqual(response.status_code, 404)
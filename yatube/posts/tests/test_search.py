@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..search import PostgresSearchBackend, search_posts
+from ..stemmer import stem
+from ..utils import UNITS_ON_PAGE
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_stem(self):
+        """Testing word forms have the same stem"""
+        words = {
+            'кошка': 'кошк',
+            'кошками': 'кошк',
+            'важнейшие': 'важн',
+            'прочитавши': 'прочита',
+            'особенности': 'особен',
+            'ёлки': 'елк',
+        }
+        for word, expected in words.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='admin'
+        )
+
+    def setUp(self):
+        self.cats = Post.objects.create(
+            text='Кошки гуляют по крышам',
+            author=self.user,
+        )
+        self.dogs = Post.objects.create(
+            text='Собака лает на кошку, кошка шипит на собаку',
+            author=self.user,
+        )
+
+    def find(self, query):
+        return list(search_posts(query).order_by('-search_rank', '-pk'))
+
+    def test_search_by_word_forms(self):
+        """Testing posts are found by other forms of words"""
+        self.assertEqual(self.find('крыша'), [self.cats])
+        self.assertEqual(self.find('кошкой'), [self.dogs, self.cats])
+        self.assertEqual(self.find('кошка собаки'), [self.dogs])
+        self.assertEqual(self.find('"; DROP'), [])
+        self.assertEqual(self.find(''), [])
+
+    def test_index_follows_edit_and_delete(self):
+        """Testing index is updated when post is edited and deleted"""
+        self.cats.text = 'Птицы поют'
+        self.cats.save()
+        self.assertEqual(self.find('крыша'), [])
+        self.assertEqual(self.find('птица'), [self.cats])
+        self.cats.delete()
+        self.assertEqual(self.find('птица'), [])
+
+    def test_search_page_cursor_pagination(self):
+        """Testing search page is paginated by cursor keeping the query"""
+        for number in range(UNITS_ON_PAGE):
+            Post.objects.create(text=f'Кошка номер {number}', author=self.user)
+        client = Client()
+        url = reverse('posts:search')
+        response = client.get(url, {'q': 'кошки'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), UNITS_ON_PAGE)
+        self.assertTrue(page_obj.has_next())
+        self.assertContains(
+            response, 'q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B8&amp;after='
+        )
+        response = client.get(
+            url, {'q': 'кошки', 'after': page_obj.next_cursor}
+        )
+        next_page = response.context['page_obj']
+        self.assertEqual(len(next_page), 2)
+        self.assertFalse(set(page_obj) & set(next_page))
+
+    def test_admin_search_uses_index(self):
+        """Testing admin changelist searches without LIKE"""
+        client = Client()
+        client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'крыши'}
+            )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.cats]
+        )
+        self.assertFalse(any(
+            'LIKE' in query['sql'] for query in context.captured_queries
+        ))
+
+    def test_rebuild_search_index_command(self):
+        """Testing command indexes posts created without signals"""
+        Post.objects.bulk_create([Post(text='Новый пост', author=self.user)])
+        self.assertEqual(self.find('новый'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 3 posts', out.getvalue())
+        self.assertEqual(len(self.find('новый')), 1)
+
+    def test_postgres_search_matches_index_expression(self):
+        """Testing PostgreSQL search filters by the indexed expression"""
+        sql = str(PostgresSearchBackend().search(
+            Post.objects.all(), 'кошка'
+        ).query)
+        self.assertIn('to_tsvector(russian, "posts_post"."text")', sql)
+        self.assertNotIn('COALESCE', sql)
@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow
+from ..suggestions import (FollowGraph, get_suggestions, suggest,
+                           suggestions_key)
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    def test_csr_neighbours_and_transpose(self):
+        """Testing CSR graph keeps edges of every node in order"""
+        graph = FollowGraph.from_sorted_edges(
+            [(0, 2), (0, 3), (2, 3), (3, 0)], 4
+        )
+        self.assertEqual(list(graph.neighbours(0)), [2, 3])
+        self.assertEqual(list(graph.neighbours(1)), [])
+        followers = graph.transpose()
+        self.assertEqual(list(followers.neighbours(3)), [0, 2])
+        self.assertEqual(list(followers.neighbours(0)), [3])
+        self.assertEqual(graph.nbytes(), 9 * graph.targets.itemsize)
+
+
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('user', 'friend', 'fof', 'fan', 'cofollow', 'other')
+        }
+        for user, author in (
+            ('user', 'friend'),
+            ('friend', 'fof'),
+            ('fan', 'friend'),
+            ('fan', 'cofollow'),
+            ('fan', 'user'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.users['user'])
+
+    def names(self, user):
+        return [author.username for author in get_suggestions(user)]
+
+    def test_batch_suggestions(self):
+        """Testing friends of friends rank above co-follows"""
+        out, err = StringIO(), StringIO()
+        call_command('update_suggestions', stdout=out, stderr=err)
+        self.assertIn('Suggested authors to 3 users from 5 follows', (
+            out.getvalue()
+        ))
+        self.assertIn('The cache is local to this process', err.getvalue())
+        self.assertEqual(self.names(self.users['user']), ['fof', 'cofollow'])
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Кого почитать')
+        self.assertEqual(
+            [author.username for author in response.context['suggestions']],
+            ['fof', 'cofollow']
+        )
+
+    def test_follow_and_unfollow_refresh_suggestions(self):
+        """Testing follows change cached suggestions incrementally"""
+        call_command(
+            'update_suggestions', stdout=StringIO(), stderr=StringIO()
+        )
+        self.client.get(reverse('posts:profile_follow', args=('fof',)))
+        self.assertEqual(self.names(self.users['user']), ['cofollow'])
+        self.client.get(reverse('posts:profile_follow', args=('fan',)))
+        self.assertEqual(self.names(self.users['user']), ['cofollow'])
+        self.client.get(reverse('posts:profile_unfollow', args=('fan',)))
+        self.assertEqual(self.names(self.users['user']), ['cofollow'])
+        other = Client()
+        other.force_login(self.users['other'])
+        other.get(reverse('posts:profile_follow', args=('friend',)))
+        # Not cached by the batch run, so computed in full
+        self.assertEqual(
+            self.names(self.users['other']), ['fof', 'user', 'cofollow']
+        )
+
+    @override_settings(SUGGESTIONS_SAMPLE=1)
+    def test_missed_user_scored_like_batch(self):
+        """Testing suggestions of a missed user match the batch run"""
+        Follow.objects.create(
+            user=self.users['other'], author=self.users['friend']
+        )
+        call_command(
+            'update_suggestions', stdout=StringIO(), stderr=StringIO()
+        )
+        for name, user in self.users.items():
+            with self.subTest(user=name):
+                self.assertEqual(
+                    suggest(user.pk), cache.get(suggestions_key(user.pk), [])
+                )
+        cache.clear()
+        self.assertEqual(self.names(self.users['user']), ['fof'])
@@ -0,0 +1,138 @@
+from http import HTTPStatus
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import syndication
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class SyndicationFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост номер {number}',
+                author=self.author,
+                group=self.group if number else None,
+            )
+            for number in range(3)
+        ]
+        self.client = Client()
+
+    def get_feed(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def rss_titles(self, url):
+        content = self.get_feed(url)[1]
+        return [
+            item.findtext('title') for item in
+            ElementTree.fromstring(content).iter('item')
+        ]
+
+    def test_feeds_of_listings(self):
+        """Testing RSS feeds contain posts of their listings"""
+        feeds = {
+            reverse('posts:feed_index', args=('rss',)): [
+                'Пост номер 2', 'Пост номер 1', 'Пост номер 0'
+            ],
+            reverse('posts:feed_group', args=('rss', 'test-slug')): [
+                'Пост номер 2', 'Пост номер 1'
+            ],
+            reverse('posts:feed_profile', args=('rss', 'author')): [
+                'Пост номер 2', 'Пост номер 1', 'Пост номер 0'
+            ],
+        }
+        for url, titles in feeds.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.rss_titles(url), titles)
+
+    def test_atom_feed(self):
+        """Testing Atom feed is valid XML with entry links"""
+        response, content = self.get_feed(
+            reverse('posts:feed_index', args=('atom',))
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/atom+xml; charset=utf-8'
+        )
+        entries = list(ElementTree.fromstring(content).iter(f'{ATOM}entry'))
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(
+            entries[0].find(f'{ATOM}link').get('href'),
+            'http://testserver' + reverse(
+                'posts:post_detail', args=(self.posts[2].pk,)
+            )
+        )
+
+    def test_missing_feeds(self):
+        """Testing unknown formats, groups and authors return 404"""
+        for url in (
+            reverse('posts:feed_index', args=('json',)),
+            reverse('posts:feed_group', args=('rss', 'missing')),
+            reverse('posts:feed_profile', args=('rss', 'missing')),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url).status_code, HTTPStatus.NOT_FOUND
+                )
+
+    def test_feed_is_cached_until_edit(self):
+        """Testing feed is served from cache until its post is edited"""
+        url = reverse('posts:feed_group', args=('rss', 'test-slug'))
+        self.get_feed(url)
+        with self.assertNumQueries(2):
+            response, _ = self.get_feed(url)
+        self.assertFalse(response.streaming)
+        self.posts[1].text = 'Измененный пост'
+        self.posts[1].save()
+        self.assertEqual(
+            self.rss_titles(url), ['Пост номер 2', 'Измененный пост']
+        )
+
+    @override_settings(POST_FEED_SIZE=2)
+    def test_new_post_renders_only_its_item(self):
+        """Testing new post does not render other items again"""
+        url = reverse('posts:feed_index', args=('rss',))
+        self.get_feed(url)
+        Post.objects.create(text='Новый пост', author=self.author)
+        with mock.patch.object(
+            syndication, 'get_item', wraps=syndication.get_item
+        ) as get_item:
+            titles = self.rss_titles(url)
+        self.assertEqual(titles, ['Новый пост', 'Пост номер 2'])
+        self.assertEqual(get_item.call_count, 1)
+
+    def test_conditional_feed(self):
+        """Testing feed answers 304 until a post is added"""
+        url = reverse('posts:feed_profile', args=('atom', 'author'))
+        etag = self.get_feed(url)[0]['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED
+        )
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..cards import POST, version_key
+from ..listings import INDEX, generation_key, profile_listing
+from ..models import Post
+from ..stamps import get_stamps
+from ..thumbnails import generate_thumbnails, get_ready_thumbnail
+from ..variants import generate_variants, get_formats
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=self.small_gif,
+                content_type='image/gif'
+            ),
+        )
+
+    def get_ready(self):
+        return get_ready_thumbnail(
+            self.post.image, '960x339', crop='center', upscale=True
+        )
+
+    def test_generate_thumbnails(self):
+        """Testing thumbnails are ready only after generation"""
+        self.assertIsNone(self.get_ready())
+        self.assertEqual(generate_thumbnails(self.post), 1)
+        self.assertIsNotNone(self.get_ready())
+        self.assertEqual(generate_thumbnails(self.post), 0)
+
+    def test_page_falls_back_to_original_image(self):
+        """Testing pages show original image until thumbnail is ready"""
+        detail_url = reverse('posts:post_detail', args=(self.post.id,))
+        response = Client().get(detail_url)
+        self.assertContains(response, self.post.image.url)
+        generate_thumbnails(self.post)
+        response = Client().get(detail_url)
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, self.get_ready().url)
+
+    @override_settings(POST_THUMBNAIL_SIZES=[('320x240', {'crop': 'center'})])
+    def test_page_shows_configured_size(self):
+        """Testing pages show thumbnail of the configured size"""
+        generate_thumbnails(self.post)
+        thumbnail = get_ready_thumbnail(
+            self.post.image, '320x240', crop='center'
+        )
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertContains(response, thumbnail.url)
+
+    def test_generate_thumbnails_command(self):
+        """Testing command creates missing thumbnails and refreshes pages"""
+        keys = [
+            version_key(POST, self.post.pk), generation_key(INDEX),
+            generation_key(profile_listing(self.user.username)),
+        ]
+        before = get_stamps(keys)
+        out = StringIO()
+        call_command('generate_thumbnails', processes=0, stdout=out)
+        self.assertIn('Created 1 thumbnails', out.getvalue())
+        self.assertIsNotNone(self.get_ready())
+        after = get_stamps(keys)
+        for key in keys:
+            self.assertNotEqual(after[key], before[key])
+        updated_at = self.post.updated_at
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, updated_at)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    THUMBNAIL_WORKERS=0,
+    POST_IMAGE_VARIANT_WIDTHS=[480, 960],
+)
+class ImageVariantsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(buffer, 'PNG')
+        cls.picture = buffer.getvalue()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост с большой картинкой',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='big.png',
+                content=self.picture,
+                content_type='image/png'
+            ),
+        )
+
+    def test_generate_variants(self):
+        """Testing variants are cropped and saved in every format"""
+        formats = get_formats()
+        self.assertEqual(generate_variants(self.post), 2 * len(formats))
+        self.assertEqual(generate_variants(self.post), 0)
+        self.post.refresh_from_db()
+        variants = self.post.variants
+        self.assertEqual(
+            {(variant['width'], variant['height']) for variant in variants},
+            {(480, 170), (960, 339)}
+        )
+        self.assertIn('image/jpeg', {variant['mime'] for variant in variants})
+        for variant in variants:
+            with Image.open(
+                os.path.join(TEMP_MEDIA_ROOT, variant['name'])
+            ) as image:
+                self.assertEqual(
+                    image.size, (variant['width'], variant['height'])
+                )
+
+    def test_page_shows_picture_with_srcset(self):
+        """Testing pages show srcset of variants when they are ready"""
+        detail_url = reverse('posts:post_detail', args=(self.post.id,))
+        self.assertNotContains(Client().get(detail_url), '<picture>')
+        generate_variants(self.post)
+        response = Client().get(detail_url)
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, '-480.jpg 480w')
+        self.assertContains(response, '-960.jpg 960w')
+        self.assertContains(response, 'width="960" height="339"')
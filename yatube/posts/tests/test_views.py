@@ -16,7 +16,7 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -173,20 +173,44 @@ class PostPagesTests(TestCase):
         self.assertNotIn(self.post, response.context['page_obj'])
 
     def test_cache(self):
+        """Testing index is cached until posts are changed"""
+        cache.clear()
         new_post = Post.objects.create(
             text='Новый пост для кеша',
             author=self.user,
             group=self.group,
         )
-        content_before_delete = self.post_author.get(
+        content_before_update = self.post_author.get(
+            reverse('posts:index')).content
+        Post.objects.filter(pk=new_post.pk).update(text='Без сигналов')
+        content_after_update = self.post_author.get(
             reverse('posts:index')).content
+        self.assertEqual(content_before_update, content_after_update)
         new_post.delete()
         content_after_delete = self.post_author.get(
             reverse('posts:index')).content
-        cache.clear()
-        self.assertEqual(
-            content_before_delete, content_after_delete
+        self.assertNotEqual(content_before_update, content_after_delete)
+        self.assertNotIn(
+            'Новый пост для кеша', content_after_delete.decode()
+        )
+
+    def test_listing_generations_bumped_on_write(self):
+        """Testing new post is shown on cached listings at once"""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        ]
+        for url in urls:
+            self.post_author.get(url)
+        self.post_author.post(
+            reverse('posts:post_create'),
+            data={'text': 'Только что созданный', 'group': self.group.id},
         )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.post_author.get(url)
+                self.assertContains(response, 'Только что созданный')
 
 
 class PaginatorViewsTest(TestCase):
@@ -258,6 +282,71 @@ class PaginatorViewsTest(TestCase):
                 )
 
 
+@override_settings(PAGINATION_MODE='cursor')
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.UNITS_ON_PAGE_1 = 10
+        cls.UNITS_ON_PAGE_2 = 3
+        cls.user_writer = User.objects.create_user(username='WriteLover')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(13):
+            Post.objects.create(
+                text=f'Тестовый пост {i}',
+                author=cls.user_writer,
+                group=cls.group,
+            )
+        cls.urls_paginator = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.user_writer.username,)),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.post_writer = Client()
+        self.post_writer.force_login(self.user_writer)
+
+    def test_cursor_pages(self):
+        """Testing next and previous cursor pages have the right units"""
+        for url in self.urls_paginator:
+            with self.subTest(url=url):
+                first_page = self.post_writer.get(url).context['page_obj']
+                self.assertEqual(len(first_page), self.UNITS_ON_PAGE_1)
+                self.assertFalse(first_page.has_previous())
+                self.assertTrue(first_page.has_next())
+                second_page = self.post_writer.get(
+                    url + f'?after={first_page.next_cursor}'
+                ).context['page_obj']
+                self.assertEqual(len(second_page), self.UNITS_ON_PAGE_2)
+                self.assertFalse(second_page.has_next())
+                self.assertTrue(second_page.has_previous())
+                previous_page = self.post_writer.get(
+                    url + f'?before={second_page.previous_cursor}'
+                ).context['page_obj']
+                self.assertEqual(
+                    previous_page.object_list,
+                    first_page.object_list
+                )
+                self.assertFalse(previous_page.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Testing broken cursor returns the first page"""
+        response = self.post_writer.get(
+            self.urls_paginator[0] + '?after=broken'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.context['page_obj']),
+            self.UNITS_ON_PAGE_1
+        )
+
+
 class FollowViewsTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -0,0 +1,158 @@
+"""
+Thumbnail pre-generation of post images.
+
+Thumbnails of all POST_THUMBNAIL_SIZES and responsive image variants
+are created after the post is saved, in a pool of THUMBNAIL_WORKERS
+threads or, without the pool, right after commit. Page renders only
+look up ready images and never resize images synchronously.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import metrics
+
+from . import cards, listings
+from .models import Post
+from .stamps import bump_stamps
+from .variants import generate_variants
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_workers():
+    return getattr(settings, 'THUMBNAIL_WORKERS', 2)
+
+
+def get_sizes():
+    """Returns (geometry, options) pairs of thumbnails of post images."""
+    return getattr(settings, 'POST_THUMBNAIL_SIZES', [
+        ('960x339', {'crop': 'center', 'upscale': True}),
+    ])
+
+
+class PregeneratedThumbnailBackend(ThumbnailBackend):
+    """Backend able to look up thumbnail without creating it."""
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """
+        Returns thumbnail as ImageFile if it was already created,
+        otherwise None.
+        """
+        if not file_:
+            return None
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = PregeneratedThumbnailBackend()
+
+
+def get_ready_thumbnail(image, geometry_string, **options):
+    with metrics.timer(metrics.THUMBNAIL):
+        return backend.get_ready_thumbnail(
+            image, geometry_string, **options
+        )
+
+
+def get_post_thumbnail(image):
+    """
+    Returns ready thumbnail of the first POST_THUMBNAIL_SIZES,
+    the one shown in post cards, or None.
+    """
+    geometry_string, options = get_sizes()[0]
+    return get_ready_thumbnail(image, geometry_string, **options)
+
+
+def generate_thumbnails(post):
+    """
+    Creates all thumbnails of the post image.
+    Returns number of created thumbnails.
+    """
+    if not post.image:
+        return 0
+    created = 0
+    for geometry_string, options in get_sizes():
+        if backend.get_ready_thumbnail(
+            post.image, geometry_string, **options
+        ) is None:
+            backend.get_thumbnail(post.image, geometry_string, **options)
+            created += 1
+    return created
+
+
+def refresh_posts(post_ids):
+    """
+    Marks the posts with new images as edited and makes their cached
+    cards and listings stale.
+    """
+    if not post_ids:
+        return
+    Post.objects.filter(pk__in=post_ids).update(updated_at=timezone.now())
+    bump_stamps([cards.version_key(cards.POST, pk) for pk in post_ids])
+    listings.bump_listings([
+        listings.INDEX, *listings.get_commented_posts_listings(post_ids)
+    ])
+
+
+def refresh_post_thumbnails(post_id):
+    """
+    Creates thumbnails and image variants of the post
+    and refreshes its cached pages.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    if generate_thumbnails(post) + generate_variants(post):
+        refresh_posts([post.pk])
+
+
+def refresh_in_background(post_id):
+    close_old_connections()
+    try:
+        refresh_post_thumbnails(post_id)
+    except Exception:
+        logger.exception('Thumbnails of post %s were not created', post_id)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_workers(),
+            thread_name_prefix='thumbnails'
+        )
+    return _executor
+
+
+def schedule_thumbnails(post):
+    """Creates thumbnails of the post after commit."""
+    if not post.image:
+        return
+    if not get_workers():
+        transaction.on_commit(lambda: refresh_post_thumbnails(post.pk))
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(refresh_in_background, post.pk)
+    )
@@ -0,0 +1,121 @@
+"""
+Bounded handling of post image uploads.
+
+Uploads are streamed to a temporary file and bytes above
+POST_IMAGE_MAX_UPLOAD_SIZE are dropped, so a large upload never sits
+in memory. Images are checked by their headers before decoding, large
+JPEGs are decoded in draft mode at a reduced scale, and images are saved
+again without metadata (EXIF, comments, text chunks).
+"""
+from functools import wraps
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+# Formats saved again on upload, others (e.g. animated GIF) are kept as is
+NORMALIZED_FORMATS = {
+    'JPEG': 'JPEG',
+    'MPO': 'JPEG',
+    'PNG': 'PNG',
+    'WEBP': 'WEBP',
+}
+
+
+def get_max_upload_size():
+    return getattr(settings, 'POST_IMAGE_MAX_UPLOAD_SIZE', 20 * 1024 * 1024)
+
+
+def get_max_side():
+    return getattr(settings, 'POST_IMAGE_MAX_SIDE', 2560)
+
+
+def get_max_pixels():
+    return getattr(settings, 'POST_IMAGE_MAX_PIXELS', 50 * 1000 * 1000)
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every uploaded file to disk and stops writing it
+    after POST_IMAGE_MAX_UPLOAD_SIZE bytes. Size of the file
+    is still the size of the whole upload.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.max_size = get_max_upload_size()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+
+def bounded_uploads(view):
+    """
+    Handles uploads of the view with BoundedUploadHandler.
+    CSRF is checked after handlers are replaced, because
+    the check reads request.POST.
+    """
+    protected_view = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [BoundedUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+    return wrapper
+
+
+def is_too_large(upload):
+    return upload.size > get_max_upload_size()
+
+
+def size_error():
+    return forms.ValidationError(
+        'Размер файла не должен превышать %(size)s.',
+        code='file_too_large',
+        params={'size': filesizeformat(get_max_upload_size())},
+    )
+
+
+def normalize_image(upload):
+    """
+    Reduces uploaded image to POST_IMAGE_MAX_SIDE
+    and saves it again without metadata.
+    """
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if image.width * image.height > get_max_pixels():
+            raise forms.ValidationError(
+                'Слишком большое разрешение картинки.',
+                code='too_many_pixels',
+            )
+        image_format = NORMALIZED_FORMATS.get(image.format)
+        if image_format is None:
+            upload.seek(0)
+            return upload
+        max_side = get_max_side()
+        scale = min(1, max_side / max(image.size))
+        # JPEG is decoded right at a reduced scale, not at full size
+        image.draft('RGB', (
+            max(1, round(image.width * scale)),
+            max(1, round(image.height * scale)),
+        ))
+        image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3)
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    # Pixels are loaded, so the upload is rewritten in place
+    upload.seek(0)
+    upload.truncate()
+    # PNG encoder falls back to EXIF of image.info, it is dropped too
+    image.save(upload, image_format, quality=85, optimize=True, exif=b'')
+    upload.size = upload.tell()
+    upload.seek(0)
+    return upload
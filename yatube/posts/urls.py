@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, syndication, views
 
 app_name = 'posts'
 urlpatterns = [
@@ -8,6 +8,11 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -16,6 +21,37 @@ urlpatterns = [
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+    path('trending/', views.trending, name='trending'),
+    path(
+        'trending/group/<slug:slug>/',
+        views.trending,
+        name='trending_group'
+    ),
+    path('api/v1/posts/', api.index, name='api_index'),
+    path('api/v1/posts/<int:post_id>/', api.post_detail, name='api_post'),
+    path('api/v1/group/<slug:slug>/', api.group_posts, name='api_group'),
+    path(
+        'api/v1/profile/<str:username>/',
+        api.profile,
+        name='api_profile'
+    ),
+    path('api/v1/follow/', api.follow_index, name='api_follow'),
+    path(
+        'feeds/<str:feed_format>/',
+        syndication.index,
+        name='feed_index'
+    ),
+    path(
+        'feeds/<str:feed_format>/group/<slug:slug>/',
+        syndication.group_posts,
+        name='feed_group'
+    ),
+    path(
+        'feeds/<str:feed_format>/profile/<str:username>/',
+        syndication.profile,
+        name='feed_profile'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,10 +1,165 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
 UNITS_ON_PAGE = 10
+OFFSET_MODE = 'offset'
+CURSOR_MODE = 'cursor'
+CURSOR_SEPARATOR = '|'
+CURSOR_KEYS = ('pub_date', 'pk')
 
 
-def paginate(posts_list, request):
-    """Paginates template."""
+def encode_cursor(post, keys=CURSOR_KEYS):
+    """
+    Encodes (pub_date, id) of the post or its values() row
+    into url safe string. First key may also be a number,
+    e.g. search rank.
+    """
+    date_key, pk_key = keys
+    if isinstance(post, dict):
+        value, pk = post[date_key], post[pk_key]
+    else:
+        value, pk = getattr(post, date_key), getattr(post, pk_key)
+    value = value.isoformat() if hasattr(value, 'isoformat') else repr(value)
+    raw = f'{value}{CURSOR_SEPARATOR}{pk}'
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(cursor):
+    """
+    Decodes cursor into (pub_date, id) tuple, pub_date is float
+    for numeric cursors. Returns None if cursor is broken.
+    """
+    try:
+        raw = force_str(urlsafe_base64_decode(cursor))
+        value, pk = raw.split(CURSOR_SEPARATOR)
+        pk = int(pk)
+        pub_date = parse_datetime(value)
+        if pub_date is None:
+            pub_date = float(value)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+    return pub_date, pk
+
+
+class CursorPage:
+    """
+    Page of keyset pagination, keeps the interface
+    of django Page used in templates.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 keys=CURSOR_KEYS):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return encode_cursor(self.object_list[-1], self.keys)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return encode_cursor(self.object_list[0], self.keys)
+        return None
+
+
+def cursor_paginate(posts_list, request, per_page=UNITS_ON_PAGE,
+                    keys=CURSOR_KEYS):
+    """
+    Paginates queryset by (pub_date, id) without COUNT and OFFSET.
+    Page is chosen by ?after=<cursor> or ?before=<cursor>,
+    keys are names of the date and id fields to paginate by.
+    """
+    date_key, pk_key = keys
+    before = keyset_filter(
+        posts_list, keys, 'gt', decode_cursor(request.GET.get('before', ''))
+    )
+    after = keyset_filter(
+        posts_list, keys, 'lt', decode_cursor(request.GET.get('after', ''))
+    )
+    if after is None and before is not None:
+        objects = list(
+            before.order_by(date_key, pk_key)[:per_page + 1]
+        )
+        has_previous = len(objects) > per_page
+        objects = objects[:per_page][::-1]
+        return CursorPage(objects, True, has_previous, keys)
+    if after is not None:
+        posts_list = after
+    objects = list(
+        posts_list.order_by(f'-{date_key}', f'-{pk_key}')[:per_page + 1]
+    )
+    has_next = len(objects) > per_page
+    return CursorPage(objects[:per_page], has_next, after is not None, keys)
+
+
+def keyset_filter(posts_list, keys, lookup, cursor):
+    """
+    Returns posts following the cursor by keys in the lookup direction,
+    or None if there is no cursor or it doesn't fit the keys.
+    """
+    if cursor is None:
+        return None
+    date_key, pk_key = keys
+    value, pk = cursor
+    try:
+        return posts_list.filter(
+            Q(**{f'{date_key}__{lookup}': value})
+            | Q(**{date_key: value, f'{pk_key}__{lookup}': pk})
+        )
+    except (TypeError, ValidationError):
+        return None
+
+
+def paginate(posts_list, request, mode=None, keys=CURSOR_KEYS):
+    """
+    Paginates template.
+    Mode is 'offset' or 'cursor', by default PAGINATION_MODE setting.
+    """
+    mode = mode or getattr(settings, 'PAGINATION_MODE', OFFSET_MODE)
+    if mode == CURSOR_MODE:
+        return cursor_paginate(posts_list, request, keys=keys)
     paginator = Paginator(posts_list, UNITS_ON_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def load_page(posts_list, request, mode=None, keys=CURSOR_KEYS):
+    """
+    Paginates like paginate() and fetches the page at once,
+    so the queries run in the calling thread.
+    """
+    page_obj = paginate(posts_list, request, mode, keys)
+    page_obj.object_list = list(page_obj.object_list)
+    return page_obj
@@ -0,0 +1,139 @@
+"""
+Responsive variants of post images.
+
+Image is decoded once, cropped to POST_IMAGE_RATIO and saved in every
+width of POST_IMAGE_VARIANT_WIDTHS as JPEG, WebP and AVIF (when Pillow
+supports them). Variants metadata is kept in Post.image_variants,
+so pages build srcset without touching the storage.
+"""
+import json
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .models import Post
+
+FORMATS = (
+    ('AVIF', 'avif', 'image/avif'),
+    ('WEBP', 'webp', 'image/webp'),
+    ('JPEG', 'jpg', 'image/jpeg'),
+)
+FALLBACK_MIME = 'image/jpeg'
+VARIANTS_DIR = 'posts/variants'
+
+
+def get_widths():
+    return getattr(settings, 'POST_IMAGE_VARIANT_WIDTHS', [480, 960, 1440])
+
+
+def get_ratio():
+    return getattr(settings, 'POST_IMAGE_RATIO', (960, 339))
+
+
+def is_supported(pil_format):
+    """Checks if Pillow can save the format."""
+    if pil_format == 'WEBP':
+        return features.check('webp')
+    Image.init()
+    return pil_format in Image.SAVE
+
+
+def get_formats():
+    """Returns formats to save variants in, best compression first."""
+    return [
+        image_format for image_format in FORMATS
+        if is_supported(image_format[0])
+    ]
+
+
+def get_sizes(source_width):
+    """
+    Returns (width, height) of the variants not wider than the source.
+    The smallest variant is always made.
+    """
+    ratio_width, ratio_height = get_ratio()
+    widths = sorted(get_widths())
+    widths = [width for width in widths if width <= source_width] or widths[:1]
+    return [
+        (width, round(width * ratio_height / ratio_width)) for width in widths
+    ]
+
+
+def make_variants(post):
+    """Saves variants of the post image, returns their metadata."""
+    with post.image.open('rb') as file:
+        source = Image.open(file)
+        source.load()
+    source = ImageOps.exif_transpose(source).convert('RGB')
+    stem = os.path.splitext(os.path.basename(post.image.name))[0]
+    sizes = get_sizes(source.width)
+    largest = ImageOps.fit(source, sizes[-1], Image.LANCZOS)
+    variants = []
+    for width, height in sizes:
+        image = largest.resize((width, height), Image.LANCZOS)
+        for pil_format, extension, mime in get_formats():
+            buffer = BytesIO()
+            image.save(buffer, pil_format, quality=80)
+            name = default_storage.save(
+                f'{VARIANTS_DIR}/{post.pk}/{stem}-{width}.{extension}',
+                ContentFile(buffer.getvalue())
+            )
+            variants.append({
+                'name': name,
+                'width': width,
+                'height': height,
+                'mime': mime,
+            })
+    return variants
+
+
+def generate_variants(post):
+    """
+    Creates variants of the post image if they are missing.
+    Returns number of created variants.
+    """
+    if not post.image or post.image_variants:
+        return 0
+    variants = make_variants(post)
+    post.image_variants = json.dumps(variants)
+    Post.objects.filter(pk=post.pk).update(
+        image_variants=post.image_variants
+    )
+    return len(variants)
+
+
+def get_picture(post):
+    """
+    Returns data of <picture> tag for the post image:
+    sources of modern formats and fallback JPEG img.
+    Returns None if variants are not created yet.
+    """
+    variants = post.variants
+    if not variants:
+        return None
+    srcsets = {}
+    for variant in variants:
+        srcsets.setdefault(variant['mime'], []).append(
+            f"{default_storage.url(variant['name'])} {variant['width']}w"
+        )
+    fallback = [
+        variant for variant in variants if variant['mime'] == FALLBACK_MIME
+    ]
+    return {
+        'sources': [
+            {'mime': mime, 'srcset': ', '.join(srcsets[mime])}
+            for _, _, mime in FORMATS
+            if mime in srcsets and mime != FALLBACK_MIME
+        ],
+        'srcset': ', '.join(srcsets.get(FALLBACK_MIME, [])),
+        'src': default_storage.url(fallback[-1]['name']),
+        'width': fallback[-1]['width'],
+        'height': fallback[-1]['height'],
+        'sizes': getattr(
+            settings, 'POST_IMAGE_SIZES', '(max-width: 960px) 100vw, 960px'
+        ),
+    }
@@ -1,13 +1,54 @@
+import math
+
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
+
+from core.parallel import gather
+from core.routers import replica_reads
 
+from . import comments, ranking, ratelimit
+from .api import (COMMENT_FIELDS, comments_page_url, error,
+                  serialize_comment)
+from .conditional import (conditional, listing_freshness, page_parts,
+                          post_freshness)
+from .feed import FEED_CURSOR_KEYS, get_feed
 from .forms import CommentForm, PostForm
+from .ingest import save_comment
+from .listings import (INDEX, cache_listing, group_listing,
+                       profile_listing)
 from .models import Follow, Group, Post, User
-from .utils import paginate
+from .search import SEARCH_CURSOR_KEYS, search_posts
+from .suggestions import get_suggestions
+from .thumbnails import schedule_thumbnails
+from .uploads import bounded_uploads
+from .utils import cursor_paginate, load_page, paginate
+
+
+def group_freshness(request, slug):
+    return listing_freshness(
+        [group_listing(slug)],
+        Post.objects.filter(group__slug=slug),
+        *page_parts(request)
+    )
 
 
-@cache_page(20, key_prefix="index_page")
+def profile_freshness(request, username):
+    return listing_freshness(
+        [profile_listing(username)],
+        Post.objects.filter(author__username=username),
+        *page_parts(request)
+    )
+
+
+def post_detail_freshness(request, post_id):
+    return post_freshness(post_id, *page_parts(request))
+
+
+@replica_reads
+@cache_listing(lambda: INDEX)
 def index(request):
     """
     Function rendering html template and returning
@@ -21,14 +62,20 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@conditional(group_freshness, vary_on_cookie=True)
+@cache_listing(group_listing)
 def group_posts(request, slug):
     """
     Function rendering html template and returning
     model objects and limits according to paginator for group posts page
     """
-    group = get_object_or_404(Group, slug=slug)
-    posts_list = group.posts.select_related('group', 'author')
-    page_obj = paginate(posts_list, request)
+    group, page_obj = gather(
+        lambda: get_object_or_404(Group, slug=slug),
+        lambda: load_page(Post.objects.filter(group__slug=slug).select_related(
+            'group', 'author'
+        ), request),
+    )
     context = {
         'page_obj': page_obj,
         'group': group,
@@ -36,46 +83,56 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+@conditional(profile_freshness, vary_on_cookie=True)
+@cache_listing(profile_listing)
 def profile(request, username):
     """
     Function rendering html template and returning
     model objects
     """
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group', 'author')
-    page_obj = paginate(post_list, request)
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            author=author,
-            user=request.user
-        ).exists()
-        context = {
-            'author': author,
-            'page_obj': page_obj,
-            'following': following
-        }
-        return render(request, 'posts/profile.html', context)
+    user_id = request.user.pk
+    author, page_obj, following = gather(
+        lambda: get_object_or_404(
+            User.objects.select_related('stats'),
+            username=username
+        ),
+        lambda: load_page(Post.objects.filter(
+            author__username=username
+        ).select_related('group', 'author'), request),
+        lambda: user_id is not None and Follow.objects.filter(
+            author__username=username,
+            user_id=user_id
+        ).exists(),
+    )
     context = {
         'author': author,
         'page_obj': page_obj,
     }
+    if user_id is not None:
+        context['following'] = following
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
+@conditional(post_detail_freshness, vary_on_cookie=True)
 def post_detail(request, post_id):
     """
     Function rendering html template and returning
     model objects
     """
-    post_object = get_object_or_404(Post.objects.select_related(
-        'group',
-        'author',
-    ), id=post_id)
-    comments = post_object.comments.select_related('author', 'post')
+    post_object, first_comments = gather(
+        lambda: get_object_or_404(Post.objects.select_related(
+            'group',
+            'author',
+            'author__stats',
+        ), id=post_id),
+        lambda: comments.render_first_page(post_id),
+    )
     form = CommentForm(request.POST or None)
     context = {
         'post_object': post_object,
-        'comments': comments,
+        'comments': first_comments,
         'form': form
     }
     return render(
@@ -86,6 +143,7 @@ def post_detail(request, post_id):
 
 
 @login_required
+@bounded_uploads
 def post_create(request):
     """
     Function rendering html template and returning
@@ -98,12 +156,15 @@ def post_create(request):
     if request.method == "POST" and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        form.save()
+        with transaction.atomic():
+            form.save()
+            schedule_thumbnails(post)
         return redirect('posts:profile', username=post.author)
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
+@bounded_uploads
 def post_edit(request, post_id):
     """
     Function rendering html template and returning
@@ -118,7 +179,12 @@ def post_edit(request, post_id):
         instance=post
     )
     if request.method == "POST" and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            if 'image' in form.changed_data:
+                post.image_variants = ''
+            form.save()
+            if 'image' in form.changed_data:
+                schedule_thumbnails(post)
         return redirect('posts:post_detail', post_id)
     return render(
         request,
@@ -127,41 +193,116 @@ def post_edit(request, post_id):
     )
 
 
+@replica_reads
+def post_comments(request, post_id):
+    """
+    Returns page of the post comments after ?after=<cursor>
+    as html fragment, or as JSON with ?format=json
+    """
+    as_json = request.GET.get('format') == 'json'
+    if not Post.objects.filter(pk=post_id).exists():
+        if as_json:
+            return error('Пост не найден', 404)
+        raise Http404('Пост не найден')
+    comments_list = comments.get_comments(post_id)
+    if as_json:
+        page = comments.get_page(
+            comments_list.values(*COMMENT_FIELDS), request
+        )
+        return JsonResponse({
+            'results': [serialize_comment(row) for row in page],
+            'next': page.next_cursor and comments_page_url(
+                post_id, page.next_cursor
+            ),
+        })
+    page = comments.get_page(comments_list.select_related('author'), request)
+    return render(
+        request,
+        'posts/includes/comments.html',
+        {'post_id': post_id, 'comments': page}
+    )
+
+
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post.objects.select_related(
-        'author',
-        'group',
-    ), id=post_id)
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404('Пост не найден')
     form = CommentForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
+        limit = ratelimit.get_comment_rate_limit()
+        retry_after = limit and ratelimit.take_token(
+            ratelimit.bucket_key('comment', request.user.pk), *limit
+        )
+        if retry_after:
+            response = render(request, 'core/429.html', status=429)
+            response['Retry-After'] = math.ceil(retry_after)
+            return response
         comment = form.save(commit=False)
         comment.author = request.user
-        comment.post = post
-        comment.save()
+        comment.post_id = post_id
+        save_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
 @login_required
 def follow_index(request):
-    posts_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginate(posts_list, request)
-    context = {'page_obj': page_obj}
+    user = request.user
+    page_obj, suggestions = gather(
+        lambda: load_page(
+            get_feed(user).select_related('group', 'author'),
+            request, keys=FEED_CURSOR_KEYS
+        ),
+        lambda: get_suggestions(user),
+    )
+    context = {
+        'page_obj': page_obj,
+        'suggestions': suggestions,
+    }
     return render(request, 'posts/follow.html', context)
 
 
+def trending(request, slug=None):
+    """
+    Function rendering trending posts of all groups
+    or of the group from cached ranking
+    """
+    group = None
+    if slug is not None:
+        group = get_object_or_404(Group, slug=slug)
+    context = {
+        'posts': ranking.get_trending(slug),
+        'group': group,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def search(request):
+    """Function rendering posts found by full-text search query"""
+    query = request.GET.get('q', '').strip()
+    posts_list = search_posts(query).select_related('group', 'author')
+    page_obj = cursor_paginate(posts_list, request, keys=SEARCH_CURSOR_KEYS)
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'extra_query': f"{urlencode({'q': query})}&",
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     following_author = get_object_or_404(User, username=username)
-    follow_obj = (
-        Follow.objects.filter(author=following_author, user=request.user)
-    )
-    if follow_obj.exists() or request.user == following_author:
+    if request.user == following_author:
         return redirect('posts:profile', username=username)
-    Follow.objects.create(
-        user=request.user,
-        author=following_author
-    )
+    try:
+        with transaction.atomic():
+            Follow.objects.create(
+                user=request.user,
+                author=following_author
+            )
+    except IntegrityError:
+        pass
     return redirect('posts:profile', username=username)
 
 
@@ -172,5 +313,6 @@ def profile_unfollow(request, username):
         Follow.objects.filter(author=following_author, user=request.user)
     )
     if follow_obj.exists():
-        follow_obj.delete()
+        with transaction.atomic():
+            follow_obj.delete()
     return redirect('posts:profile', username=username)
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,10 +89,53 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.environ.get(
+            'YATUBE_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
     }
 }
 
+# PRAGMA statements run on every new sqlite connection, see core.db
+SQLITE_PRAGMAS = {}
+# Production profile selected by YATUBE_DB_PROFILE=production:
+# WAL lets readers work alongside a writer, writers wait for the lock
+# instead of failing and connections are kept between requests
+if os.environ.get('YATUBE_DB_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': 20},
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        # Durable on checkpoints only, safe from corruption in WAL mode
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        # Negative size is in KiB
+        'cache_size': -64 * 1024,
+        'busy_timeout': 20000,
+        'temp_store': 'MEMORY',
+    }
+
+# Read-only replicas of the default database kept in sync with it,
+# YATUBE_DB_REPLICAS lists their sqlite paths separated by commas.
+# Listing pages read from them, see core.routers
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Reads of a user go to the primary for this time after the user writes
+REPLICA_PIN_SECONDS = 5
+# Threads running independent queries of a view concurrently, every
+# thread keeps its own connection. 0 runs the queries in the request thread
+QUERY_WORKERS = int(os.environ.get('YATUBE_QUERY_WORKERS', 0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,10 +186,143 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-CACHES = {
-    'default': {
+MEDIA_ROOT = os.environ.get(
+    'YATUBE_MEDIA_ROOT', os.path.join(BASE_DIR, 'media')
+)
+
+# Cache is selected by YATUBE_CACHE environment variable:
+# locmem - per process, file and db - shared without external services
+# (db needs `python manage.py createcachetable`),
+# redis (needs django-redis) and memcached (needs pylibmc) - shared.
+# YATUBE_CACHE_LOCAL_TIER=1 puts in-process LRU in front of shared cache.
+CACHE_LOCATION = os.environ.get('YATUBE_CACHE_LOCATION')
+SHARED_CACHES = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': CACHE_LOCATION or 'yatube_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': CACHE_LOCATION or 'redis://127.0.0.1:6379/1',
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyLibMCCache',
+        'LOCATION': CACHE_LOCATION or '127.0.0.1:11211',
+    },
 }
+SHARED_CACHE = SHARED_CACHES[os.environ.get('YATUBE_CACHE', 'locmem')]
+
+if os.environ.get('YATUBE_CACHE_LOCAL_TIER') == '1':
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'LOCAL_MAX_ENTRIES': 1000,
+                'LOCAL_TIMEOUT': 5,
+                # invalidation stamps and rate limit buckets are always
+                # read from shared cache
+                'LOCAL_BYPASS_PREFIXES': [
+                    'card_version:', 'listing_generation:',
+                    'comments_version:', 'ratelimit:',
+                ],
+            },
+        },
+        'shared': SHARED_CACHE,
+    }
+else:
+    CACHES = {
+        'default': SHARED_CACHE,
+    }
+
+# 'offset' - numbered pages with COUNT(*),
+# 'cursor' - next/previous pages by (pub_date, id) without COUNT(*)
+PAGINATION_MODE = 'offset'
+
+# Authors with more followers are not fanned out to timelines,
+# their posts are read at request time. None disables hybrid mode.
+FEED_FANOUT_LIMIT = 10000
+# Latest posts of the author copied into timeline on follow
+FEED_BACKFILL_SIZE = 500
+
+# Timeout of rendered post cards in fragment cache, seconds
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# Comments on a page of post_detail, further pages are loaded by cursor
+COMMENTS_PAGE_SIZE = 20
+# Timeout of the cached first page of post comments, seconds
+COMMENTS_CACHE_TIMEOUT = 60 * 60
+
+# Comments of a user: number per period in seconds, None disables limit
+COMMENT_RATE_LIMIT = (10, 60)
+# Comments are saved by one bulk_create every interval in seconds from
+# an in-process buffer, None saves every comment in its request
+COMMENT_BUFFER_INTERVAL = None
+# Number of buffered comments saved without waiting for the interval
+COMMENT_BUFFER_SIZE = 500
+
+# Timeout of cached index, group and profile pages, seconds.
+# Pages are invalidated on writes by listing generations.
+LISTING_CACHE_TIMEOUT = 60 * 60
+
+# Thumbnails of post images created in background after saving the post,
+# templates fall back to the original image until they are ready.
+# Post cards show the first size
+POST_THUMBNAIL_SIZES = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Threads creating thumbnails in the background, 0 creates them right
+# after commit in the request thread
+THUMBNAIL_WORKERS = int(os.environ.get('YATUBE_THUMBNAIL_WORKERS', 2))
+
+# Responsive variants of post images cropped to POST_IMAGE_RATIO,
+# saved as JPEG, WebP and AVIF when Pillow supports them
+POST_IMAGE_VARIANT_WIDTHS = [480, 960, 1440]
+POST_IMAGE_RATIO = (960, 339)
+POST_IMAGE_SIZES = '(max-width: 960px) 100vw, 960px'
+
+# Post image uploads are streamed to disk and bytes above the limit are
+# dropped; larger images are reduced and saved without metadata
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_SIDE = 2560
+POST_IMAGE_MAX_PIXELS = 50 * 1000 * 1000
+
+# Full-text search backend of posts, by default chosen by the database:
+# FTS5 table for SQLite, to_tsvector('russian', ...) for PostgreSQL
+POST_SEARCH_BACKEND = None
+
+# Number of the latest posts in RSS and Atom feeds
+POST_FEED_SIZE = 20
+
+# Trending posts: popularity of a post (comments plus weighted log of
+# the author followers) halves every TRENDING_HALF_LIFE hours, posts
+# older than TRENDING_WINDOW days are not ranked
+TRENDING_HALF_LIFE = 24
+TRENDING_WINDOW = 7
+TRENDING_SIZE = 20
+TRENDING_FOLLOWER_WEIGHT = 1.0
+
+# "Who to follow" on the follow page: authors followed by the followed
+# authors (friends of friends, weighted) and by SUGGESTIONS_SAMPLE other
+# followers of every followed author (co-follows)
+SUGGESTIONS_SIZE = 5
+SUGGESTIONS_FOF_WEIGHT = 2
+SUGGESTIONS_SAMPLE = 20
+# Cached suggestions live until the next update_suggestions run, seconds
+SUGGESTIONS_TIMEOUT = 60 * 60 * 24 * 2
+
+# Per-request SQL, template and thumbnail timings in Server-Timing header
+# and per-view percentiles at /metrics/, enabled by YATUBE_METRICS=1
+METRICS_ENABLED = os.environ.get('YATUBE_METRICS') == '1'
+# Latest requests of every view used for percentiles
+METRICS_SAMPLES = 1000
+INTERNAL_IPS = ['127.0.0.1']
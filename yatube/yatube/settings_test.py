@@ -0,0 +1,9 @@
+"""
+Settings of the homework test suite.
+
+Its media fixture removes MEDIA_ROOT right after the test, so thumbnails
+are created in the request thread instead of the background pool.
+"""
+from .settings import *  # noqa: F401,F403
+
+THUMBNAIL_WORKERS = 0